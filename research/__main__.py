@@ -0,0 +1,30 @@
+import argparse
+
+from research.runner import load_spec, run_experiment
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m research")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run (or resume) the task grid of experiment specs")
+    run.add_argument("specs", nargs="+", help="Experiment spec JSON files")
+    run.add_argument("--output", help="Results JSONL file (single spec only)")
+    run.add_argument("--workers", type=int, default=None, help="Worker processes (1: serial)")
+    run.add_argument("--chunksize", type=int, default=1, help="Tasks per worker submission")
+
+    args = parser.parse_args(argv)
+
+    match args.command:
+
+        case "run":
+            if args.output and len(args.specs) > 1:
+                parser.error("--output needs a single spec")
+
+            for path in args.specs:
+                run_experiment(load_spec(path), args.output, args.workers, args.chunksize)
+
+
+# Guard the pool: spawned workers re-import this module
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import numpy as np
+import scipy.linalg as la
+from numpy.typing import NDArray
+
+from research.covariance import FactorCovariance
+from research.interfaces import AssetData
+
+
+class BacklogRisk:
+    """
+    Backlog (tracking-error) risk of many candidate portfolios against a reference.
+
+    The covariance is factored once (Σ = LLᵀ), so for K candidates the variances
+    (w - w*)ᵀΣ(w - w*) are the squared row norms of (W - w*)L: one triangular
+    multiply instead of K quadratic forms. Factor-model covariances skip the factorization
+    and use their O(nk) quadratic forms.
+    """
+
+    def __init__(self, data: AssetData, annualize: int = 1):
+        self.factor = data.factor
+        self.annualize = annualize
+        if not isinstance(self.factor, FactorCovariance):
+            self.cholesky = self.factor.kind == "cholesky"
+            self.root = self.factor.root()
+
+    def _project(self, differences: NDArray[np.float64]) -> NDArray[np.float64]:
+        # Rows of D L (BLAS trmm when L is a Cholesky factor)
+        if self.cholesky:
+            projected: NDArray[np.float64] = la.blas.dtrmm(
+                1.0, self.root, differences, side=1, lower=1
+            )
+            return projected
+
+        return differences @ self.root
+
+    def variances(
+        self, reference: NDArray[np.float64], candidates: NDArray[np.float64]
+    ) -> NDArray[np.float64]:
+        """Tracking-error variance of each candidate (row) against the reference."""
+        differences = np.atleast_2d(candidates) - reference
+        if isinstance(self.factor, FactorCovariance):
+            return self.factor.quadratic_forms(differences)
+
+        projected = self._project(np.asfortranarray(differences, dtype=np.float64))
+
+        variances: NDArray[np.float64] = np.einsum("ki,ki->k", projected, projected)
+        return variances
+
+    def risks(
+        self, reference: NDArray[np.float64], candidates: NDArray[np.float64]
+    ) -> NDArray[np.float64]:
+        """Annualized backlog risk (tracking-error standard deviation) of each candidate."""
+        risks: NDArray[np.float64] = np.sqrt(self.variances(reference, candidates) * self.annualize)
+        return risks
+
+    def ratios(
+        self,
+        reference: NDArray[np.float64],
+        candidates: NDArray[np.float64],
+        baseline: NDArray[np.float64],
+    ) -> NDArray[np.float64]:
+        """Backlog variance of each candidate relative to a baseline (one row or one per candidate)."""
+        ratios: NDArray[np.float64] = self.variances(reference, candidates) / self.variances(
+            reference, baseline
+        )
+        return ratios
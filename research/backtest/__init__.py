@@ -0,0 +1,5 @@
+from .engine import backtest
+from .returns import holding_period_values
+from .schedule import rebalance_positions
+
+__all__ = ["backtest", "holding_period_values", "rebalance_positions"]
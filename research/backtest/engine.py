@@ -0,0 +1,160 @@
+import time
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from research.enums import Frequency, Optimizer, Rounding
+from research.estimators import RollingMoments
+from research.interfaces import AssetData, BacktestResult
+from research.optimizers import optimize
+from research.optimizers.sweep import WARM_STARTED
+from research.portfolio import Portfolio
+
+from .returns import holding_period_values
+from .schedule import rebalance_positions
+
+
+def _rebalance(
+    optimizer: Optimizer,
+    data: AssetData,
+    wealth: float,
+    held_shares: NDArray[np.float64],
+    rounding: Rounding | None,
+    kwargs: dict[str, Any],
+) -> NDArray[np.float64]:
+    n_assets = len(data.prices)
+    weights = np.ones(n_assets) / n_assets
+
+    if optimizer in WARM_STARTED or optimizer is Optimizer.REBALANCE:
+        # Integer optimizers start from the holdings carried forward
+        start = "current_shares" if optimizer is Optimizer.REBALANCE else "initial_shares"
+        kwargs = {start: held_shares, **kwargs}
+        integer_weights = optimize(optimizer, data, weights, budget=wealth, **kwargs)
+        shares: NDArray[np.float64] = np.round(integer_weights * wealth / data.prices)
+        return shares
+
+    # Continuous optimizers are rounded to whole shares
+    portfolio = Portfolio(data, optimize(optimizer, data, weights, budget=wealth, **kwargs), wealth)
+    portfolio.round(rounding)
+    return portfolio.shares
+
+
+def backtest(
+    optimizer: Optimizer,
+    returns: pd.DataFrame,
+    prices: pd.DataFrame,
+    budget: float,
+    frequency: Frequency = Frequency.MONTHLY,
+    window: int = 252,
+    halflife: float | None = None,
+    min_periods: int | None = None,
+    rounding: Rounding | None = Rounding.FLOOR,
+    **kwargs: Any,
+) -> BacktestResult:
+    """
+    Rolling-window backtest of an optimizer on a date x asset return and price panel.
+
+    At the last trading day of each period (once `window` days are available) expected returns
+    and covariances are estimated from the trailing window, the portfolio is re-optimized for
+    its current value and converted to whole shares, and the shares are held until the next
+    rebalance. Integer optimizers are warm-started from the held shares; continuous ones are
+    rounded with `rounding`. Assets without a price or enough history (`min_periods`, default
+    half the window) on a rebalance day are not traded that day; unpriced holdings are sold at
+    their last price, and a day with no tradable asset keeps the current holdings. Holdings are valued at the day's prices and the rest of the total return
+    (dividends) is credited to cash, which earns nothing until the next rebalance.
+    The backtest stops (later values are NaN) if the portfolio value falls to zero or below.
+
+    `kwargs` go to engine.optimize (gamma, solver, time_limit, ...).
+    """
+    names = returns.columns.to_numpy().astype(str)
+    dates = pd.DatetimeIndex(returns.index)
+    daily_returns = returns.to_numpy(dtype=np.float64)
+    daily_prices = prices.reindex(index=returns.index, columns=returns.columns).to_numpy(
+        dtype=np.float64
+    )
+    n_dates, n_assets = daily_returns.shape
+    # Half the window, so a few missing returns do not make an asset untradable
+    min_periods = max(window // 2, 2) if min_periods is None else min_periods
+
+    positions = rebalance_positions(dates, frequency)
+    positions = positions[positions >= window - 1]
+
+    estimator = RollingMoments(n_assets, window, halflife, min_periods)
+    values = np.full(n_dates, np.nan)
+    held = np.zeros(n_assets)  # Whole shares
+    last_prices = np.full(n_assets, np.nan)  # Last known price of each asset
+    cash = budget
+    rebalanced, shares_history, cash_history, solve_times = [], [], [], []
+    fed, previous = 0, -1
+
+    for position in positions:
+        estimator.extend(daily_returns[fed : position + 1])
+        fed = position + 1
+
+        # Value the holdings over the period since the last rebalance
+        holdings_value = 0.0
+        if previous >= 0:
+            period = slice(previous + 1, position + 1)
+            period_values, dividend_cash, last_prices = holding_period_values(
+                held, last_prices, daily_prices[period], daily_returns[period]
+            )
+            values[period] = cash + dividend_cash + period_values
+            cash += dividend_cash[-1]
+            holdings_value = period_values[-1]
+
+        wealth = cash + holdings_value
+        values[position] = wealth
+
+        # Leveraged (short) portfolios can be wiped out; there is no budget left to invest
+        if wealth <= 0:
+            previous = -1
+            break
+
+        # Tradable universe of the day
+        mean, covariance = estimator.mean(), estimator.covariance()
+        tradable = np.isfinite(daily_prices[position]) & np.isfinite(mean)
+        tradable &= np.isfinite(covariance[:, tradable]).all(axis=1)
+        if not tradable.any():
+            previous = position
+            continue
+
+        data = AssetData(
+            names[tradable],
+            daily_prices[position, tradable],
+            mean[tradable],
+            covariance[np.ix_(tradable, tradable)],
+        )
+
+        start = time.perf_counter()
+        shares = _rebalance(optimizer, data, wealth, held[tradable], rounding, kwargs)
+        solve_times.append(time.perf_counter() - start)
+
+        # Untradable holdings are sold at their last price
+        held = np.zeros(n_assets)
+        held[tradable] = shares
+        last_prices[tradable] = data.prices
+        cash = wealth - float(shares @ data.prices)
+
+        rebalanced.append(position)
+        shares_history.append(held.copy())
+        cash_history.append(cash)
+        previous = position
+
+    # Hold the last portfolio to the end of the data
+    if previous >= 0 and previous + 1 < n_dates:
+        period_values, dividend_cash, _ = holding_period_values(
+            held, last_prices, daily_prices[previous + 1 :], daily_returns[previous + 1 :]
+        )
+        values[previous + 1 :] = cash + dividend_cash + period_values
+
+    return BacktestResult(
+        names=names,
+        dates=dates.to_numpy(),
+        values=values,
+        rebalance_dates=dates[rebalanced].to_numpy(),
+        shares=np.array(shares_history).reshape(len(shares_history), n_assets),
+        cash=np.array(cash_history),
+        solve_times=np.array(solve_times),
+    )
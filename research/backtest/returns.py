@@ -0,0 +1,33 @@
+import numpy as np
+from numpy.typing import NDArray
+
+
+def holding_period_values(
+    shares: NDArray[np.float64],
+    start_prices: NDArray[np.float64],
+    prices: NDArray[np.float64],
+    returns: NDArray[np.float64],
+) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Value of fixed whole-share holdings over a holding period.
+
+    `shares` are bought at `start_prices` and held through the (days, assets) `prices` and
+    total `returns` that follow. Missing prices carry the last price forward and missing
+    returns count as flat. The part of a day's total return the price change does not explain
+    (dividends) is paid per share as cash. Returns the holdings value and the cumulative
+    dividend cash on each day, and the last known prices.
+    """
+    # Forward-fill the prices from the start prices
+    path = np.vstack([start_prices, prices]).astype(np.float64)
+    rows = np.where(np.isfinite(path), np.arange(len(path))[:, None], 0)
+    path = np.take_along_axis(path, np.maximum.accumulate(rows, axis=0), axis=0)
+
+    # Dividend per share: what the total return adds on top of the price change
+    held = shares != 0
+    priced = np.isfinite(returns[:, held]) & np.isfinite(prices[:, held])
+    dividends = np.where(priced, path[:-1, held] * (1 + returns[:, held]) - path[1:, held], 0.0)
+
+    values: NDArray[np.float64] = path[1:, held] @ shares[held]
+    dividend_cash: NDArray[np.float64] = np.cumsum(dividends @ shares[held])
+    last_prices: NDArray[np.float64] = path[-1]
+    return values, dividend_cash, last_prices
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from research.enums import Frequency
+
+
+def rebalance_positions(dates: pd.DatetimeIndex, frequency: Frequency) -> NDArray[np.intp]:
+    """Positions of the last trading date of each month, quarter or year in `dates`."""
+    match frequency:
+        case Frequency.MONTHLY:
+            periods = dates.to_period("M")
+        case Frequency.QUARTERLY:
+            periods = dates.to_period("Q")
+        case Frequency.ANNUAL:
+            periods = dates.to_period("Y")
+        case _:
+            raise ValueError(f"Unknown frequency: {frequency}")
+
+    # A period ends where the next date falls in a later period
+    codes = periods.to_numpy()
+    return np.flatnonzero(np.append(codes[1:] != codes[:-1], True))
@@ -0,0 +1,202 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import scipy.linalg as la
+from numpy.typing import NDArray
+
+
+@dataclass(eq=False)
+class FactorCovariance:
+    """
+    A dataclass to represent a factor-model covariance Σ = B F B' + D, including:
+    - Factor exposures B, one row per asset
+    - Factor covariance F
+    - Idiosyncratic (specific) variances, the diagonal of D
+
+    Stores O(nk) numbers instead of O(n²). Supports Σ @ x and x @ Σ in O(nk), so quadratic
+    forms like w.T @ Σ @ w work unchanged; np.asarray(Σ) builds the dense matrix.
+    """
+
+    exposures: NDArray[np.float64]  # 2D array of floats (n_assets, n_factors)
+    factor_covariance: NDArray[np.float64]  # 2D array of floats (n_factors, n_factors)
+    idiosyncratic_variances: NDArray[np.float64]  # Array of floats (n_assets)
+    factor_root: NDArray[np.float64] = field(init=False, repr=False)  # G = B chol(F)
+
+    # Make ndarray @ FactorCovariance defer to __rmatmul__
+    __array_ufunc__ = None
+
+    def __post_init__(self) -> None:
+        for name in ("exposures", "factor_covariance", "idiosyncratic_variances"):
+            array = np.array(getattr(self, name), dtype=np.float64)
+            array.flags.writeable = False
+            setattr(self, name, array)
+
+        # Σ = GG' + D with G = B chol(F)
+        factor_root = la.cholesky(self.factor_covariance, lower=True)
+        self.factor_root = self.exposures @ factor_root
+        self.factor_root.flags.writeable = False
+
+    @classmethod
+    def from_returns(
+        cls, returns: NDArray[np.float64], n_factors: int, min_variance: float = 1e-12
+    ) -> "FactorCovariance":
+        """
+        Principal-component factor model of a (n_periods, n_assets) return matrix: the top
+        n_factors components become the factors and the residual sample variance the
+        idiosyncratic part, so the diagonal matches the sample covariance.
+        """
+        returns = np.asarray(returns, dtype=np.float64)
+        n_periods = returns.shape[0]
+        centered = returns - returns.mean(axis=0)
+
+        # SVD of the return matrix avoids forming the n x n sample covariance
+        _, singular_values, components = la.svd(centered, full_matrices=False)
+        factor_variances = singular_values[:n_factors] ** 2 / (n_periods - 1)
+        exposures = components[:n_factors].T
+
+        total_variances = np.sum(centered**2, axis=0) / (n_periods - 1)
+        explained = (exposures**2) @ factor_variances
+
+        return cls(
+            exposures,
+            np.diag(factor_variances),
+            np.maximum(total_variances - explained, min_variance),
+        )
+
+    @classmethod
+    def constant_correlation(
+        cls, volatilities: NDArray[np.float64], correlations: NDArray[np.float64] | float
+    ) -> "FactorCovariance":
+        """
+        One-factor model with Σ_ii = σ_i² and Σ_ij = σ_i σ_j √(ρ_i ρ_j): exposures σ_i √ρ_i
+        and idiosyncratic variances σ_i² (1 - ρ_i). Equal ρ gives σ²((1 - ρ)I + ρ11') for
+        equal volatilities, in O(n) memory.
+        """
+        volatilities = np.asarray(volatilities, dtype=np.float64)
+        correlations = np.broadcast_to(
+            np.asarray(correlations, dtype=np.float64), volatilities.shape
+        )
+        if np.any(correlations < 0) or np.any(correlations >= 1):
+            raise ValueError("Correlations must be in [0, 1)")
+
+        return cls(
+            (volatilities * np.sqrt(correlations))[:, None],
+            np.ones((1, 1)),
+            volatilities**2 * (1 - correlations),
+        )
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        n_assets = len(self.idiosyncratic_variances)
+        return n_assets, n_assets
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    @property
+    def n_factors(self) -> int:
+        return int(self.exposures.shape[1])
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __matmul__(self, other: Any) -> NDArray[np.float64]:
+        # Σx = G(G'x) + Dx for a vector or a stack of column vectors
+        other = np.asarray(other, dtype=np.float64)
+        idiosyncratic = (
+            self.idiosyncratic_variances[:, None]
+            if other.ndim > 1
+            else self.idiosyncratic_variances
+        )
+        product: NDArray[np.float64] = (
+            self.factor_root @ (self.factor_root.T @ other) + idiosyncratic * other
+        )
+        return product
+
+    def __rmatmul__(self, other: Any) -> NDArray[np.float64]:
+        # x'Σ = (Σx)' since Σ is symmetric
+        other = np.asarray(other, dtype=np.float64)
+        return self.__matmul__(other.T).T
+
+    def __array__(self, dtype: Any = None, copy: bool | None = None) -> NDArray[Any]:
+        dense = self.to_dense()
+        return dense if dtype is None else dense.astype(dtype)
+
+    def to_dense(self) -> NDArray[np.float64]:
+        dense: NDArray[np.float64] = self.factor_root @ self.factor_root.T
+        dense[np.diag_indices_from(dense)] += self.idiosyncratic_variances
+        return dense
+
+    def diagonal(self) -> NDArray[np.float64]:
+        diagonal: NDArray[np.float64] = (
+            np.einsum("ik,ik->i", self.factor_root, self.factor_root) + self.idiosyncratic_variances
+        )
+        return diagonal
+
+    def column(self, index: int) -> NDArray[np.float64]:
+        column: NDArray[np.float64] = self.factor_root @ self.factor_root[index]
+        column[index] += self.idiosyncratic_variances[index]
+        return column
+
+    def block(self, rows: NDArray[np.intp], columns: NDArray[np.intp]) -> NDArray[np.float64]:
+        """Σ[rows][:, columns] in O(|rows| |columns| k), without forming Σ."""
+        block: NDArray[np.float64] = self.factor_root[rows] @ self.factor_root[columns].T
+
+        # D only adds where a row and a column are the same asset
+        row, column = np.nonzero(rows[:, None] == columns[None, :])
+        block[row, column] += self.idiosyncratic_variances[rows[row]]
+
+        return block
+
+    def quadratic_forms(self, weights: NDArray[np.float64]) -> NDArray[np.float64]:
+        """w'Σw for each row of a (K, n) weight array, in O(Knk)."""
+        weights = np.atleast_2d(weights)
+        exposures = weights @ self.factor_root
+        forms: NDArray[np.float64] = np.einsum("kf,kf->k", exposures, exposures) + (
+            weights**2 @ self.idiosyncratic_variances
+        )
+        return forms
+
+    def solve(self, rhs: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Solve Σx = rhs with the Woodbury identity in O(nk²)."""
+        rhs = np.asarray(rhs, dtype=np.float64)
+        inverse_idiosyncratic = 1 / self.idiosyncratic_variances
+        if rhs.ndim > 1:
+            inverse_idiosyncratic = inverse_idiosyncratic[:, None]
+
+        # Σ⁻¹ = D⁻¹ - D⁻¹G (I + G'D⁻¹G)⁻¹ G'D⁻¹
+        scaled_root = self.factor_root / self.idiosyncratic_variances[:, None]
+        capacitance = np.eye(self.n_factors) + self.factor_root.T @ scaled_root
+        correction = la.solve(capacitance, scaled_root.T @ rhs, assume_a="pos")
+
+        solution: NDArray[np.float64] = inverse_idiosyncratic * rhs - scaled_root @ correction
+        return solution
+
+
+def quadratic_forms(
+    covariance: NDArray[np.float64] | FactorCovariance, weights: NDArray[np.float64]
+) -> NDArray[np.float64]:
+    """w'Σw for each row of a (K, n) weight array, for dense or factor covariances."""
+    if isinstance(covariance, FactorCovariance):
+        return covariance.quadratic_forms(weights)
+
+    weights = np.atleast_2d(weights)
+    forms: NDArray[np.float64] = np.einsum(
+        "ki,ij,kj->k", weights, covariance, weights, optimize=True
+    )
+    return forms
+
+
+def covariance_block(
+    covariance: NDArray[np.float64] | FactorCovariance,
+    rows: NDArray[np.intp],
+    columns: NDArray[np.intp],
+) -> NDArray[np.float64]:
+    """Σ[rows][:, columns] for dense or factor covariances."""
+    if isinstance(covariance, FactorCovariance):
+        return covariance.block(rows, columns)
+
+    block: NDArray[np.float64] = np.asarray(covariance)[np.ix_(rows, columns)]
+    return block
@@ -1,23 +1,39 @@
 import os
+from collections.abc import Iterator
+from functools import cached_property
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from numpy.typing import NDArray
 
+from research.covariance import FactorCovariance
+from research.estimators import rolling_asset_data
 from research.interfaces import AssetData
 
+from .cache import cached_asset_data
 from .config import ROOT
 
 DATA_DIR = ROOT + "/data"
 RAW_FILE_PATH = DATA_DIR + "/basic.csv"
 CLEAN_FILE_PATH = DATA_DIR + "/basic.parquet"
+CACHE_DIR = DATA_DIR + "/basic_cache"
 
 
 class Basic:
     """
     Simple dataset of 4 stocks with 10 years of historical data from yahoo finance.
+
+    With `factors` the covariance is a principal-component factor model with that many
+    factors instead of the dense sample covariance.
+
+    The derived AssetData is cached as .npy files next to the clean parquet and memory-mapped
+    on later loads; it is recomputed only when the parquet changes.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, factors: int | None = None) -> None:
+        self.factors = factors
+
         if not os.path.exists(ROOT + "/data"):
             os.makedirs(ROOT + "/data")
 
@@ -27,8 +43,13 @@ class Basic:
                 self.download()
 
             self.clean()
-        self.df = pd.read_parquet(CLEAN_FILE_PATH)
-        self.values()
+
+        cache_dir = CACHE_DIR + ("/dense" if factors is None else f"/factors_{factors}")
+        self.asset_data = cached_asset_data(cache_dir, CLEAN_FILE_PATH, self.compute)
+
+    @cached_property
+    def df(self) -> pd.DataFrame:
+        return pd.read_parquet(CLEAN_FILE_PATH)
 
     def download(self) -> None:
         tickers = sorted(["AAPL", "VZ", "F", "COKE"])
@@ -60,12 +81,34 @@ class Basic:
         df.to_parquet(CLEAN_FILE_PATH)
 
     def values(self) -> None:
-        df = pd.read_parquet(CLEAN_FILE_PATH)
+        self.asset_data = self.compute()
+
+    def compute(self) -> AssetData:
+        df = self.df
         names = df["ticker"].unique()
         prices = df.groupby("ticker").agg({"close": "last"}).to_numpy().T[0]
         expected_returns = df.groupby("ticker")["ret"].mean().to_numpy()
-        covariance_matrix = (
-            df.pivot(index="date", values="ret", columns="ticker").fillna(0).cov().to_numpy()
+        returns = df.pivot(index="date", values="ret", columns="ticker").fillna(0)
+
+        covariance_matrix: NDArray[np.float64] | FactorCovariance
+        if self.factors is None:
+            covariance_matrix = returns.cov().to_numpy()
+        else:
+            covariance_matrix = FactorCovariance.from_returns(returns.to_numpy(), self.factors)
+
+        return AssetData(names, prices, expected_returns, covariance_matrix)
+
+    def rolling(
+        self, window: int, halflife: float | None = None, step: int = 1
+    ) -> Iterator[tuple[pd.Timestamp, AssetData]]:
+        """
+        AssetData for each `step`-th date, estimated from the trailing `window` days of returns
+        (missing returns are skipped pairwise) and priced at that date's close.
+        """
+        df = self.df
+        returns = df.pivot(index="date", values="ret", columns="ticker")
+        prices = df.pivot(index="date", values="close", columns="ticker")
+
+        yield from rolling_asset_data(
+            returns, prices, window, halflife, min_periods=window, step=step
         )
-
-        self.asset_data = AssetData(names, prices, expected_returns, covariance_matrix)
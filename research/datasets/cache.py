@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from research.covariance import FactorCovariance
+from research.interfaces import AssetData
+
+# Bump when the layout or the computation of the cached arrays changes
+CACHE_VERSION = 1
+METADATA_FILE = "metadata.json"
+
+FACTOR_ARRAYS = ("exposures", "factor_covariance", "idiosyncratic_variances")
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+def _source_key(path: str) -> dict[str, Any]:
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _read_metadata(directory: str) -> dict[str, Any] | None:
+    try:
+        with open(os.path.join(directory, METADATA_FILE)) as file:
+            metadata: dict[str, Any] = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return metadata if metadata.get("version") == CACHE_VERSION else None
+
+
+def _write_replacing(path: str, write: Callable[[Any], None], mode: str = "wb") -> None:
+    # Written to a unique temporary file and renamed into place: concurrent writers never
+    # share a file, and memory maps of the old file keep their (unchanged) inode
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, mode) as file:
+            write(file)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def _write_metadata(directory: str, metadata: dict[str, Any]) -> None:
+    # Written last: a cache without metadata is never read
+    path = os.path.join(directory, METADATA_FILE)
+    _write_replacing(path, lambda file: json.dump(metadata, file, indent=2), mode="w")
+
+
+def save_asset_data(directory: str, data: AssetData, source: str) -> None:
+    """Write the arrays of `data` as .npy files, keyed by the source file's digest and mtime."""
+    os.makedirs(directory, exist_ok=True)
+
+    metadata_path = os.path.join(directory, METADATA_FILE)
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+
+    arrays = {
+        "names": np.asarray(data.names).astype(str),
+        "prices": data.prices,
+        "expected_returns": data.expected_returns,
+    }
+    covariance_matrix = data.covariance_matrix
+    if isinstance(covariance_matrix, FactorCovariance):
+        arrays.update({name: getattr(covariance_matrix, name) for name in FACTOR_ARRAYS})
+    else:
+        arrays["covariance_matrix"] = covariance_matrix
+
+    for name, array in arrays.items():
+        contiguous = np.ascontiguousarray(array)
+        _write_replacing(
+            os.path.join(directory, name + ".npy"), lambda file: np.save(file, contiguous)
+        )
+
+    metadata = {
+        "version": CACHE_VERSION,
+        "source": {"digest": file_digest(source), **_source_key(source)},
+        "factor_model": isinstance(covariance_matrix, FactorCovariance),
+        "arrays": sorted(arrays),
+    }
+    _write_metadata(directory, metadata)
+
+
+def load_asset_data(directory: str, source: str) -> AssetData | None:
+    """
+    Memory-mapped AssetData from the cache, or None when there is none for the current
+    contents of `source`. A changed mtime with unchanged contents (e.g. a copy) is re-keyed.
+    """
+    metadata = _read_metadata(directory)
+    if metadata is None:
+        return None
+
+    key = _source_key(source)
+    cached = metadata["source"]
+    if {name: cached[name] for name in key} != key:
+        if cached["digest"] != file_digest(source):
+            return None
+        metadata["source"] = {"digest": cached["digest"], **key}
+        _write_metadata(directory, metadata)
+
+    try:
+        arrays = {
+            name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")
+            for name in metadata["arrays"]
+        }
+    except (OSError, ValueError):
+        return None
+
+    covariance_matrix: Any
+    if metadata["factor_model"]:
+        covariance_matrix = FactorCovariance(*(arrays[name] for name in FACTOR_ARRAYS))
+    else:
+        covariance_matrix = arrays["covariance_matrix"]
+
+    return AssetData(
+        arrays["names"], arrays["prices"], arrays["expected_returns"], covariance_matrix
+    )
+
+
+def cached_asset_data(directory: str, source: str, compute: Callable[[], AssetData]) -> AssetData:
+    """AssetData derived from `source`, computed and saved to `directory` only when stale."""
+    data = load_asset_data(directory, source)
+    if data is None:
+        data = compute()
+        save_asset_data(directory, data, source)
+    return data
@@ -1,9 +1,18 @@
 import os
+import tempfile
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
 
 import gdown
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
+from research.enums import DateSampling
 from research.interfaces import AssetData
 
 from .config import ROOT
@@ -12,13 +21,76 @@ DATA_DIR = ROOT + "/data"
 RAW_FILE_PATH = DATA_DIR + "/dsf.parquet"
 CLEAN_FILE_PATH = DATA_DIR + "/crsp_daily_clean.parquet"
 
+ARROW_FILE_PATH = DATA_DIR + "/crsp_daily_clean.arrow"
+
+# Columns kept from the raw CRSP daily stock file
+KEEP_COLUMNS = ["permno", "date", "shrcd", "exchcd", "ticker", "shrout", "vol", "prc", "ret"]
+
+# Columns used by sample (permno only for DateSampling.ROWS) and panel, for callers that
+# opt into loading only those (columns=SAMPLE_COLUMNS)
+SAMPLE_COLUMNS = ("permno", "date", "ticker", "prc", "ret")
+
+# Low-cardinality string columns stored as dictionaries (categoricals in pandas)
+DICTIONARY_COLUMNS = ["ticker"]
+
+
+def _compact(table: pa.Table) -> pa.Table:
+    """Downcast int64 columns whose values fit in int32."""
+    for index, field in enumerate(table.schema):
+        if not pa.types.is_int64(field.type) or table.num_rows == 0:
+            continue
+
+        bounds = pc.min_max(table[index])
+        low, high = bounds["min"].as_py(), bounds["max"].as_py()
+        if low is None or (-(2**31) <= low and high < 2**31):
+            table = table.set_column(index, field.name, pc.cast(table[index], pa.int32()))
+
+    return table
+
+
+@contextmanager
+def _replacing(path: str) -> Iterator[str]:
+    """
+    A unique temporary path next to `path` that is renamed over it when the block succeeds,
+    so readers never see a partly written file.
+    """
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    os.close(descriptor)
+    try:
+        yield temporary
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
 
 class Historical:
     """
     Historical Dataset that can sample random days.
+
+    The clean file is read lazily on first use, all columns by default or only `columns`
+    (SAMPLE_COLUMNS is enough for sample and panel and roughly halves the memory).
+    Tickers are dictionary-encoded (categorical), integer columns are downcast to int32 where
+    their range allows and, with `float32`, float columns are downcast too. With `memory_map`
+    the data is read from an uncompressed Arrow copy of the clean file that is memory-mapped,
+    so workers share the OS page cache instead of each holding a decoded copy.
+
+    The frame is kept sorted by date (then permno) with the row offsets of each date, so a
+    day's cross-section is a slice instead of a scan over the whole frame.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        columns: Sequence[str] | None = None,
+        float32: bool = False,
+        memory_map: bool = False,
+    ) -> None:
+        self.columns = list(columns) if columns is not None else None
+        self.float32 = float32
+        self.memory_map = memory_map
+        self._df: pd.DataFrame | None = None
+        self._legacy_order: np.ndarray | None = None  # Built on first use of DateSampling.ROWS
+
         if not DATA_DIR:
             print("No data directory in root!")
             return
@@ -34,8 +106,78 @@ class Historical:
             print("CLEANING RAW FILE")
             self.clean()
 
-        print("LOADING CLEAN FILE")
-        self.df = pd.read_parquet(CLEAN_FILE_PATH)
+    def _load(self) -> pd.DataFrame:
+        if self._df is None:
+            print("LOADING CLEAN FILE")
+            self._index_dates(self._read())
+
+        assert self._df is not None
+        return self._df
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._load()
+
+    @property
+    def dates(self) -> np.ndarray:
+        self._load()
+        return self._dates
+
+    @property
+    def offsets(self) -> np.ndarray:
+        self._load()
+        return self._offsets
+
+    def _read(self) -> pd.DataFrame:
+        if self.memory_map:
+            if not os.path.exists(ARROW_FILE_PATH) or os.path.getmtime(
+                ARROW_FILE_PATH
+            ) < os.path.getmtime(CLEAN_FILE_PATH):
+                self._write_arrow()
+
+            with pa.memory_map(ARROW_FILE_PATH) as source:
+                table = pa.ipc.open_file(source).read_all()
+            table = table.select(self.columns) if self.columns is not None else table
+        else:
+            table = pq.read_table(
+                CLEAN_FILE_PATH, columns=self.columns, read_dictionary=DICTIONARY_COLUMNS
+            )
+            table = _compact(table)
+
+        if self.float32:
+            for index, field in enumerate(table.schema):
+                if pa.types.is_float64(field.type):
+                    table = table.set_column(index, field.name, pc.cast(table[index], pa.float32()))
+
+        # Zero-copy for memory-mapped numeric columns without nulls
+        frame: pd.DataFrame = table.to_pandas(split_blocks=True)
+        return frame
+
+    @staticmethod
+    def _write_arrow() -> None:
+        table = _compact(pq.read_table(CLEAN_FILE_PATH, read_dictionary=DICTIONARY_COLUMNS))
+
+        # IPC files allow one dictionary per column across all batches
+        table = table.unify_dictionaries()
+
+        # Renamed into place: other processes may have the current copy memory-mapped
+        with _replacing(ARROW_FILE_PATH) as path:
+            with pa.OSFile(path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+    def _index_dates(self, df: pd.DataFrame) -> None:
+        # Clean files written before the date index are sorted by permno; the stable sort
+        # keeps each day's rows in permno order
+        if not df["date"].is_monotonic_increasing:
+            df = df.sort_values(by="date", kind="stable", ignore_index=True)
+
+        dates = df["date"].to_numpy()
+        starts = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+        self._df = df
+        self._dates = dates[np.concatenate(([0], starts))] if len(dates) else dates
+        self._offsets = np.concatenate(([0], starts, [len(dates)]))
+        self._legacy_order = None
 
     def download(self) -> None:
         file_id = "1Zfj5XiBnf87zvYwM-l944AFRaWKfXJbo"
@@ -43,57 +185,186 @@ class Historical:
 
         gdown.download(url, RAW_FILE_PATH, quiet=False)
 
-    def clean(self) -> None:
-        # Raw file
-        df = pd.read_parquet(RAW_FILE_PATH)
+    def clean(self, batch_size: int = 1 << 20) -> None:
+        """
+        Stream the raw file into the clean file with bounded memory: batches of the needed
+        columns (stock and exchange filters pushed down to the reader) are cast and written
+        to a year-partitioned staging dataset, then each year is sorted by (date, permno),
+        deduplicated and appended to the clean file.
+        """
+        with tempfile.TemporaryDirectory(dir=DATA_DIR) as staging:
+            self._stage(staging, batch_size)
+            self._merge(staging)
+
+    def _stage(self, staging: str, batch_size: int) -> None:
+        raw = ds.dataset(RAW_FILE_PATH, format="parquet")
 
         # Filters
-        df = df.query("10 <= shrcd <= 11")  # Stocks
-        df = df.query("1 <= exchcd <= 3")  # NYSE, AMEX, NASDAQ
-
-        # Keep only necessary columns
-        keep_columns = [
-            "permno",
-            "date",
-            "shrcd",
-            "exchcd",
-            "ticker",
-            "shrout",
-            "vol",
-            "prc",
-            "ret",
-        ]
-        df = df[keep_columns]
+        stocks = (pc.field("shrcd") >= 10) & (pc.field("shrcd") <= 11)
+        exchanges = (pc.field("exchcd") >= 1) & (pc.field("exchcd") <= 3)  # NYSE, AMEX, NASDAQ
+
+        batches = raw.to_batches(
+            columns=KEEP_COLUMNS,
+            filter=stocks & exchanges,
+            batch_size=batch_size,
+            use_threads=True,
+        )
+        staged = (self._clean_batch(batch) for batch in batches)
+
+        ds.write_dataset(
+            staged,
+            staging,
+            schema=self._staging_schema(raw.schema),
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([("year", pa.int32())]), flavor="hive"),
+            existing_data_behavior="overwrite_or_ignore",
+            preserve_order=True,  # Duplicates resolve to the first raw row, as before
+        )
+
+    @staticmethod
+    def _staging_schema(raw_schema: pa.Schema) -> pa.Schema:
+        schema = pa.schema([raw_schema.field(name) for name in KEEP_COLUMNS])
+        schema = schema.set(schema.get_field_index("date"), pa.field("date", pa.timestamp("ns")))
+        schema = schema.set(schema.get_field_index("ret"), pa.field("ret", pa.float64()))
+        return schema.append(pa.field("year", pa.int32()))
+
+    @staticmethod
+    def _clean_batch(batch: pa.RecordBatch) -> pa.RecordBatch:
+        columns = dict(zip(batch.schema.names, batch.columns))
 
         # Fix ret and prc variables
-        df["prc"] = abs(df["prc"])  # Stocks with unavailable prc data are negated (bid-ask spread)
+        columns["prc"] = pc.abs(columns["prc"])  # Unavailable prc is negated (bid-ask spread)
 
         # Cast types
-        df["ret"] = pd.to_numeric(df["ret"])
-        df["date"] = pd.to_datetime(df["date"])
+        columns["ret"] = pc.cast(columns["ret"], pa.float64())
+        columns["date"] = pc.cast(columns["date"], pa.timestamp("ns"))
+        columns["year"] = pc.cast(pc.year(columns["date"]), pa.int32())
+
+        return pa.RecordBatch.from_pydict(columns)
+
+    @staticmethod
+    def _merge(staging: str) -> None:
+        partitions = sorted(
+            (entry for entry in os.scandir(staging) if entry.name.startswith("year=")),
+            key=lambda entry: int(entry.name.removeprefix("year=")),
+        )
+
+        # Written next to the clean file and renamed into place once complete
+        with _replacing(CLEAN_FILE_PATH) as path:
+            writer: pq.ParquetWriter | None = None
+            try:
+                # Years partition the dates, so sorting each year sorts the whole file
+                for partition in partitions:
+                    dataset = ds.dataset(partition.path, format="parquet")
+                    table = dataset.to_table(columns=KEEP_COLUMNS)
+                    if table.num_rows == 0:
+                        continue
+                    table = table.sort_by([("date", "ascending"), ("permno", "ascending")])
+
+                    # Drop duplicates (adjacent after the sort)
+                    dates, permnos = table["date"], table["permno"]
+                    repeated = pc.and_(
+                        pc.equal(dates[1:], dates[:-1]), pc.equal(permnos[1:], permnos[:-1])
+                    )
+                    keep = pa.concat_arrays(
+                        [pa.array([True]), pc.invert(repeated).combine_chunks()]
+                    )
+                    table = table.filter(keep)
+
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+            if writer is None:
+                raise ValueError(f"No rows in {RAW_FILE_PATH} pass the stock and exchange filters")
+
+    def _date_key(self, date: Any) -> np.datetime64:
+        key: np.datetime64 = pd.Timestamp(date).to_datetime64().astype(self.dates.dtype)
+        return key
 
-        # Sort values
-        df = df.sort_values(by=["permno", "date"])
+    def cross_section(self, date: np.datetime64 | pd.Timestamp) -> pd.DataFrame:
+        """All rows of one date, as a slice of the date-sorted frame (not a copy)."""
+        key = self._date_key(date)
+        position = np.searchsorted(self.dates, key)
+        if position == len(self.dates) or self.dates[position] != key:
+            raise KeyError(f"No data for date {date}")
+
+        return self.df.iloc[self.offsets[position] : self.offsets[position + 1]]
+
+    def panel(
+        self, n_assets: int, start: Any = None, end: Any = None, random_state: int = 47
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Date x permno return and price frames from start to end (inclusive) for n_assets stocks
+        sampled from those trading on the first date, e.g. for backtest.backtest. Days a stock
+        is not listed are NaN.
+        """
+        first = 0 if start is None else int(np.searchsorted(self.dates, self._date_key(start)))
+        last = (
+            len(self.dates)
+            if end is None
+            else int(np.searchsorted(self.dates, self._date_key(end), side="right"))
+        )
+        if first >= last:
+            raise KeyError(f"No data between {start} and {end}")
+
+        rows = self.df.iloc[self.offsets[first] : self.offsets[last]]
+        day = rows.iloc[: self.offsets[first + 1] - self.offsets[first]]
+        positions = np.random.RandomState(random_state).choice(len(day), n_assets, replace=False)
+        permnos = np.sort(day["permno"].to_numpy()[positions])
+
+        rows = rows[rows["permno"].isin(permnos)]
+        index = pd.DatetimeIndex(self.dates[first:last], name="date")
+        returns = rows.pivot(index="date", columns="permno", values="ret")
+        prices = rows.pivot(index="date", columns="permno", values="prc")
+        return (
+            returns.reindex(index=index, columns=permnos),
+            prices.reindex(index=index, columns=permnos),
+        )
 
-        # Drop duplicates
-        df = df.drop_duplicates(subset=["permno", "date"])
+    def sample_date(
+        self, random_state: int = 47, date_sampling: DateSampling = DateSampling.UNIFORM
+    ) -> np.datetime64:
+        match date_sampling:
+            case DateSampling.UNIFORM:
+                position = np.random.RandomState(random_state).randint(len(self.dates))
+                date: np.datetime64 = self.dates[position]
+                return date
 
-        # Reset index
-        df = df.reset_index(drop=True)
+            case DateSampling.ROWS:
+                # Same draw as df["date"].sample(1, random_state) on the permno-sorted frame
+                df = self.df
+                if self._legacy_order is None:
+                    self._legacy_order = np.lexsort(
+                        (df["date"].to_numpy(), df["permno"].to_numpy())
+                    )
+                row = np.random.RandomState(random_state).choice(len(df), 1, replace=False)
+                legacy_date: np.datetime64 = df["date"].to_numpy()[self._legacy_order[row[0]]]
+                return legacy_date
 
-        df.to_parquet(CLEAN_FILE_PATH)
+            case _:
+                raise ValueError(f"Unknown date sampling: {date_sampling}")
 
     def sample(
-        self, n_assets: int, random_state: int = 47, constant_covar: bool = True
+        self,
+        n_assets: int,
+        random_state: int = 47,
+        constant_covar: bool = True,
+        date_sampling: DateSampling = DateSampling.UNIFORM,
     ) -> AssetData:
-        # Sample a random date
-        random_date = self.df["date"].sample(1, random_state=random_state).iloc[0]
-        day = self.df[self.df["date"] == random_date].copy().reset_index(drop=True)
+        """
+        Sample n_assets stocks from one random date. DateSampling.ROWS weights dates by their
+        row count and reproduces samples drawn before the date index.
+        """
+        day = self.cross_section(self.sample_date(random_state, date_sampling))
 
-        # Sample indices to ensure tickers and prices align
-        sampled_indices = day.sample(n=n_assets, random_state=random_state).index
-        tickers = day.loc[sampled_indices, "ticker"].to_numpy()
-        prices = day.loc[sampled_indices, "prc"].to_numpy()
+        # Sample positions to ensure tickers and prices align (same draw as day.sample)
+        positions = np.random.RandomState(random_state).choice(len(day), n_assets, replace=False)
+        tickers = day["ticker"].to_numpy()[positions]
+        prices = day["prc"].to_numpy()[positions]
 
         # Create AssetData instance
         asset_data = AssetData(
@@ -111,6 +382,6 @@ class Historical:
     def _covariance_matrix(self, n_assets: int, random_state: int = 47) -> np.ndarray:
         np.random.seed(random_state)
         random_matrix = np.random.rand(n_assets, n_assets)
-        cov_matrix = np.dot(random_matrix, random_matrix.T)
+        cov_matrix: np.ndarray = np.dot(random_matrix, random_matrix.T)
         cov_matrix = cov_matrix / np.max(cov_matrix)  # Normalize
         return cov_matrix
@@ -1,31 +1,99 @@
+from collections.abc import Iterator
+
 import numpy as np
+from numpy.typing import NDArray
 
+from research.covariance import FactorCovariance
 from research.interfaces import AssetData
 
 
 class Synthetic:
+    """
+    Synthetic universe of `n_assets` stocks with random prices, expected returns of 10% and a
+    constant-correlation covariance σ²((1 - ρ)I + ρ11') (variance 0.2, covariance 0.1 by
+    default).
+
+    The covariance is a one-factor FactorCovariance, so it takes O(n) memory and the
+    optimizers and Portfolio work on it in O(n); `dense=True` builds the n x n matrix instead.
+    `draw=False` skips drawing `asset_data` from the global NumPy RNG, for seeded use through
+    universes().
+    """
 
-    def __init__(self, price_mean: float, price_std: float, n_assets: int) -> None:
+    def __init__(
+        self,
+        price_mean: float,
+        price_std: float,
+        n_assets: int,
+        volatility: float = np.sqrt(0.2),
+        correlation: float = 0.5,
+        dense: bool = False,
+        draw: bool = True,
+    ) -> None:
         self.price_mean = price_mean
         self.price_std = price_std
         self.n_assets = n_assets
+        self.volatility = volatility
+        self.correlation = correlation
+        self.dense = dense
 
-        self.generate()
-
-    def generate(self) -> None:
-
-        prices = np.round(abs(np.random.normal(self.price_mean, self.price_std, self.n_assets)), 2)
+        if draw:
+            self.generate()
 
+    def _asset_data(
+        self,
+        prices: NDArray[np.float64],
+        volatilities: NDArray[np.float64],
+        correlations: NDArray[np.float64] | float,
+    ) -> AssetData:
         names = np.array([f"stock_{i+1}" for i in range(self.n_assets)])
 
         expected_returns = np.ones(self.n_assets) / 10
 
-        covariance_matrix = np.full((self.n_assets, self.n_assets), 0.1)
-        np.fill_diagonal(covariance_matrix, 0.2)
+        covariance_matrix: NDArray[np.float64] | FactorCovariance
+        covariance_matrix = FactorCovariance.constant_correlation(volatilities, correlations)
+        if self.dense:
+            covariance_matrix = np.asarray(covariance_matrix)
 
-        self.asset_data = AssetData(
+        return AssetData(
             names=names,
             prices=prices,
             expected_returns=expected_returns,
             covariance_matrix=covariance_matrix,
         )
+
+    def generate(self) -> None:
+
+        prices = np.round(abs(np.random.normal(self.price_mean, self.price_std, self.n_assets)), 2)
+
+        volatilities = np.full(self.n_assets, self.volatility)
+
+        self.asset_data = self._asset_data(prices, volatilities, self.correlation)
+
+    def universes(
+        self,
+        n_universes: int,
+        seed: int | np.random.SeedSequence | None = None,
+        volatility_range: tuple[float, float] = (0.1, 0.6),
+        correlation_range: tuple[float, float] = (0.0, 0.8),
+    ) -> Iterator[AssetData]:
+        """
+        Stream `n_universes` independent universes with per-asset volatilities and
+        correlations drawn uniformly from the given ranges.
+
+        Universe i is drawn from the i-th child of SeedSequence(seed), so it is the same
+        whatever the batch size or order it is generated in (e.g. across worker processes).
+        """
+        seed_sequence = (
+            seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        )
+
+        for child in seed_sequence.spawn(n_universes):
+            generator = np.random.default_rng(child)
+
+            prices = np.round(
+                abs(generator.normal(self.price_mean, self.price_std, self.n_assets)), 2
+            )
+            volatilities = generator.uniform(*volatility_range, self.n_assets)
+            correlations = generator.uniform(*correlation_range, self.n_assets)
+
+            yield self._asset_data(prices, volatilities, correlations)
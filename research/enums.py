@@ -7,6 +7,8 @@ class Optimizer(Enum):
     TWO_STAGE_SLSQP = "two_stage_slsqp"
     TWO_STAGE_QP = "two_stage_qp"
     MIQP = "miqp"
+    REBALANCE = "rebalance"
+    MAX_SHARPE = "max_sharpe"
     GA = "ga"
 
 
@@ -16,6 +18,23 @@ class Rounding(Enum):
     MID = "mid"
 
 
+class DateSampling(Enum):
+    UNIFORM = "uniform"  # Each trading date equally likely
+    ROWS = "rows"  # Dates weighted by their number of rows (legacy)
+
+
+class Dataset(Enum):
+    BASIC = "basic"
+    SYNTHETIC = "synthetic"
+    HISTORICAL = "historical"
+
+
+class Frequency(Enum):
+    MONTHLY = "monthly"
+    QUARTERLY = "quarterly"
+    ANNUAL = "annual"
+
+
 class ChartType(Enum):
     SCATTER = "scatter"
     LINE = "line"
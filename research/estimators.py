@@ -0,0 +1,168 @@
+from collections import deque
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import scipy.linalg as la
+from numpy.typing import NDArray
+
+from research.interfaces import AssetData
+
+
+def _rank_one(matrix: NDArray[np.float64], alpha: float, x: NDArray[Any], y: NDArray[Any]) -> None:
+    # matrix += alpha x y' in place (BLAS ger on a Fortran-ordered matrix)
+    updated = la.blas.dger(alpha, x, y, a=matrix, overwrite_a=True)
+    if updated is not matrix:
+        matrix[...] = updated
+
+
+class RollingMoments:
+    """
+    Mean and covariance of the last `window` return rows (all rows when None), updated in
+    O(n²) per row instead of recomputed from the whole window.
+
+    Rows may contain NaN: means use each asset's observed days and covariances the days both
+    assets were observed (pairwise, like DataFrame.cov). With `halflife` the rows are
+    exponentially weighted (weight 1/2 after `halflife` rows) and the covariance uses the
+    unbiased reliability-weight correction, so it matches DataFrame.cov for equal weights.
+
+    The window is kept as weighted pairwise sums: adding a row is a decay plus rank-1 updates,
+    dropping the oldest row is a rank-1 downdate with its decayed weight. The sums are rebuilt
+    from the window after every `window` downdates so their rounding does not accumulate,
+    which keeps the amortized cost O(n²) per row.
+    """
+
+    def __init__(
+        self,
+        n_assets: int,
+        window: int | None = None,
+        halflife: float | None = None,
+        min_periods: int = 2,
+    ):
+        if window is not None and window < 1:
+            raise ValueError("window must be at least 1")
+
+        self.n_assets = n_assets
+        self.window = window
+        self.decay = 1.0 if halflife is None else 0.5 ** (1 / halflife)
+        self.min_periods = min_periods
+
+        self._rows: deque[tuple[NDArray[np.float64], NDArray[np.float64]]] = deque()
+        self._clear()
+
+    def _clear(self) -> None:
+        shape = (self.n_assets, self.n_assets)
+        self._counts = np.zeros(shape, order="F")  # Days both observed
+        self._weights = np.zeros(shape, order="F")  # Σ w
+        self._squared_weights = np.zeros(shape, order="F")  # Σ w²
+        self._sums = np.zeros(shape, order="F")  # Σ w x_i (over days j is also observed)
+        self._products = np.zeros(shape, order="F")  # Σ w x_i x_j
+        self._downdates = 0  # Since the sums were last rebuilt
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _accumulate(
+        self, values: NDArray[np.float64], observed: NDArray[np.float64], weight: float, sign: int
+    ) -> None:
+        _rank_one(self._counts, sign, observed, observed)
+        _rank_one(self._weights, sign * weight, observed, observed)
+        _rank_one(self._squared_weights, sign * weight**2, observed, observed)
+        _rank_one(self._sums, sign * weight, values, observed)
+        _rank_one(self._products, sign * weight, values, values)
+
+    def update(self, returns: NDArray[np.float64]) -> None:
+        """Add one row of returns, dropping the oldest row once the window is full."""
+        returns = np.asarray(returns, dtype=np.float64)
+        if returns.shape != (self.n_assets,):
+            raise ValueError(f"Expected {self.n_assets} returns, got shape {returns.shape}")
+
+        observed = (~np.isnan(returns)).astype(np.float64)
+        values = np.where(observed > 0, returns, 0.0)
+
+        # Older rows lose weight by one step
+        if self.decay != 1.0:
+            for matrix in (self._weights, self._sums, self._products):
+                matrix *= self.decay
+            self._squared_weights *= self.decay**2
+
+        self._accumulate(values, observed, 1.0, 1)
+        self._rows.append((values, observed))
+
+        if self.window is not None and len(self._rows) > self.window:
+            old_values, old_observed = self._rows.popleft()
+            self._accumulate(old_values, old_observed, self.decay**self.window, -1)
+
+            self._downdates += 1
+            if self._downdates >= self.window:
+                self.refresh()
+
+    def extend(self, rows: Iterable[NDArray[np.float64]]) -> None:
+        for row in rows:
+            self.update(row)
+
+    def refresh(self) -> None:
+        """Rebuild the sums from the rows in the window, clearing accumulated rounding."""
+        rows = list(self._rows)
+        self._clear()
+        for age, (values, observed) in enumerate(reversed(rows)):
+            self._accumulate(values, observed, self.decay**age, 1)
+
+    def mean(self) -> NDArray[np.float64]:
+        counts = np.diagonal(self._counts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean: NDArray[np.float64] = np.diagonal(self._sums) / np.diagonal(self._weights)
+        return np.where(counts >= max(self.min_periods, 1), mean, np.nan)
+
+    def covariance(self) -> NDArray[np.float64]:
+        weights = self._weights
+        with np.errstate(invalid="ignore", divide="ignore"):
+            centered = self._products - self._sums * self._sums.T / weights
+            covariance: NDArray[np.float64] = centered / (weights - self._squared_weights / weights)
+
+        covariance = np.where(self._counts >= max(self.min_periods, 2), covariance, np.nan)
+        return np.ascontiguousarray(covariance)
+
+    def asset_data(self, names: NDArray[np.str_], prices: NDArray[np.float64]) -> AssetData:
+        """
+        AssetData of the assets with a mean and a covariance with every other such asset.
+        Assets observed on fewer than min_periods days (alone or jointly) are dropped, so no
+        NaN estimate reaches the optimizers.
+        """
+        mean, covariance = self.mean(), self.covariance()
+        estimated = np.isfinite(mean)
+        estimated &= np.isfinite(covariance[:, estimated]).all(axis=1)
+        if not estimated.any():
+            raise ValueError("No asset has enough observations for an estimate")
+
+        return AssetData(
+            np.asarray(names)[estimated],
+            np.asarray(prices)[estimated],
+            mean[estimated],
+            covariance[np.ix_(estimated, estimated)],
+        )
+
+
+def rolling_asset_data(
+    returns: pd.DataFrame,
+    prices: pd.DataFrame,
+    window: int | None = None,
+    halflife: float | None = None,
+    min_periods: int = 2,
+    step: int = 1,
+) -> Iterator[tuple[Any, AssetData]]:
+    """
+    Stream (date, AssetData) for every `step`-th date of a date x asset return frame, estimated
+    from the window ending at that date and priced at that date's prices (same layout). Assets
+    without enough observations in the window are left out of that date's AssetData.
+    """
+    estimator = RollingMoments(returns.shape[1], window, halflife, min_periods)
+    names = returns.columns.to_numpy()
+    values = returns.to_numpy(dtype=np.float64)
+    prices = prices.reindex(index=returns.index, columns=returns.columns)
+
+    for position, date in enumerate(returns.index):
+        estimator.update(values[position])
+        if len(estimator) >= min_periods and (position + 1 - min_periods) % step == 0:
+            yield date, estimator.asset_data(names, prices.iloc[position].to_numpy())
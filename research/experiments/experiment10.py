@@ -1,81 +1,92 @@
 import numpy as np
 import pandas as pd
 
+from research.backlog import BacklogRisk
 from research.datasets import Historical
 from research.enums import ChartType, Optimizer, Rounding
-from research.optimizers import optimize
-from research.portfolio import Portfolio
+from research.optimizers import optimize_many
+from research.optimizers.batch import Task
+from research.portfolio import Portfolio, PortfolioBatch
 from research.utils import chart, table
 
-historical_distribution = Historical()
 methods = [Rounding.CEIL, Rounding.FLOOR, Rounding.MID]
 budget = 1e6
 
-# Initial weights
 n_assets_list = [10 * x for x in range(1, 11)]
 num_samples = 30
 
 
-for n_assets in n_assets_list:
-    print(f"Number of assets: {n_assets}")
-    qp_results_list = []
-    initial_weights = np.ones(n_assets) / n_assets
-    for sample_seed in range(num_samples):
-        print(f"Starting sample {sample_seed}")
-        data = historical_distribution.sample(n_assets, sample_seed, True)
-        opt_weights_list = []
-
-        # print(f"Running benchmark optimizers")
-        optimal_weights = optimize(Optimizer.QP, data, initial_weights)
-        opt_weights_list.append(optimal_weights)
-        portfolio = Portfolio(data, optimal_weights, budget, annualize=252)
-        result = portfolio.metrics_df()
-
-        qp_results_list.append(
-            {
-                "sample": sample_seed,
-                "n_assets": n_assets,
-                "method": Optimizer.QP.value,
-                "standard_deviation": result["standard_deviation"].iloc[0],
-                "value": result["value"].iloc[0],
-                "deficit": budget - result["value"].iloc[0],
-                "benchmark": None,
-                "backlog": None,
-            }
-        )
-
-        # print("Running integer optimizers")
-        for opt_weights in opt_weights_list:
-            for method in methods:
-                optimal_weights = optimize(Optimizer.QP, data, initial_weights)
-                portfolio = Portfolio(data, optimal_weights, budget, annualize=252)
-                rnd_weights = portfolio.round(method)
-
-                opt_m_rnd = opt_weights - rnd_weights
-                backlog = np.sqrt(opt_m_rnd.T @ data.covariance_matrix @ opt_m_rnd) * np.sqrt(252)
-
-                result = portfolio.metrics_df()
+# Guard the pool: spawned workers re-import this module
+if __name__ == "__main__":
+    historical_distribution = Historical()
+
+    for n_assets in n_assets_list:
+        print(f"Number of assets: {n_assets}")
+        qp_results_list = []
+        samples = [
+            historical_distribution.sample(n_assets, sample_seed, True)
+            for sample_seed in range(num_samples)
+        ]
+
+        # Solve every sample in parallel: QP benchmark and two-stage QP per sample
+        tasks: list[Task] = [(Optimizer.QP, data, {}) for data in samples]
+        tasks += [(Optimizer.TWO_STAGE_QP, data, {"budget": budget}) for data in samples]
+        solutions = list(optimize_many(tasks))
+        for solution in solutions:
+            if not solution.ok:
+                print(
+                    f"Task {solution.index} ({solution.optimizer.value}) failed:\n{solution.error}"
+                )
+
+        for sample_seed, data in enumerate(samples):
+            # Failed tasks were reported above; a sample without a benchmark is skipped
+            if not solutions[sample_seed].ok:
+                continue
+            opt_weights = solutions[sample_seed].weights
+            portfolio = Portfolio(data, opt_weights, budget, annualize=252)
+            result = portfolio.metrics_df()
+
+            qp_results_list.append(
+                {
+                    "sample": sample_seed,
+                    "n_assets": n_assets,
+                    "method": Optimizer.QP.value,
+                    "standard_deviation": result["standard_deviation"].iloc[0],
+                    "value": result["value"].iloc[0],
+                    "deficit": budget - result["value"].iloc[0],
+                    "benchmark": None,
+                    "backlog": None,
+                }
+            )
+
+            # All rounding methods at once
+            rounded = PortfolioBatch(data, opt_weights, budget, annualize=252).rounded(methods)
+            rounded_metrics = rounded.metrics()
+
+            backlog_risk = BacklogRisk(data, annualize=252)
+            backlogs = backlog_risk.risks(opt_weights, rounded.weights)
 
+            for i, method in enumerate(methods):
                 qp_results_list.append(
                     {
                         "sample": sample_seed,
                         "n_assets": n_assets,
                         "method": Optimizer.QP.value + "_" + method.value,
-                        "standard_deviation": result["standard_deviation"].iloc[0],
-                        "value": result["value"].iloc[0],
-                        "deficit": budget - result["value"].iloc[0],
+                        "standard_deviation": rounded_metrics["standard_deviation"][i],
+                        "value": rounded_metrics["value"][i],
+                        "deficit": budget - rounded_metrics["value"][i],
                         "benchmark": Optimizer.QP.value,
-                        "backlog": backlog,
+                        "backlog": backlogs[i],
                     }
                 )
 
-        # print("Computing backlog risk")
-        for opt_weights in opt_weights_list:
-            two_weights = optimize(Optimizer.TWO_STAGE_QP, data, initial_weights, budget=budget)
+            two_stage = solutions[num_samples + sample_seed]
+            if not two_stage.ok:
+                continue
+            two_weights = two_stage.weights
             portfolio = Portfolio(data, two_weights, budget, annualize=252)
 
-            opt_m_two = opt_weights - two_weights
-            backlog = np.sqrt(opt_m_two.T @ data.covariance_matrix @ opt_m_two) * np.sqrt(252)
+            backlog = backlog_risk.risks(opt_weights, two_weights)[0]
 
             result = portfolio.metrics_df()
 
@@ -92,8 +103,8 @@ for n_assets in n_assets_list:
                 }
             )
 
-    results = pd.DataFrame(qp_results_list)
-    results.to_csv(f"samples_{n_assets}.csv")
+        results = pd.DataFrame(qp_results_list)
+        results.to_csv(f"samples_{n_assets}.csv")
 
 # table(title="Backlog risk for different optimization benchmarks", data=results, precision=6)
 
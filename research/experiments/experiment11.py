@@ -1,10 +1,11 @@
 import numpy as np
 import pandas as pd
 
+from research.backlog import BacklogRisk
 from research.datasets import Historical
 from research.enums import ChartType, Optimizer
 from research.interfaces import AssetData
-from research.optimizers import optimize
+from research.optimizers import optimize, optimize_sweep
 from research.utils import chart, table
 
 historical_distribution = Historical()
@@ -19,7 +20,14 @@ initial_weights = np.ones(n_assets) / n_assets
 for sample_seed in range(num_samples):
     print(f"Sample {sample_seed}")
     data = historical_distribution.sample(n_assets, sample_seed, True)
-    for budget in budgets:
+    backlog_risk = BacklogRisk(data)
+
+    # Two-stage portfolios, each budget warm-started from the previous one
+    two_weights_list = optimize_sweep(
+        Optimizer.TWO_STAGE_QP, data, [{"budget": budget} for budget in budgets]
+    )
+
+    for budget, two_weights in zip(budgets, two_weights_list):
         print(f"Budget {budget}")
         # Optimal portfolio
         optimal_weights = optimize(Optimizer.QP, data, initial_weights, budget=budget)
@@ -28,17 +36,8 @@ for sample_seed in range(num_samples):
         rnd_weights = optimize(Optimizer.QP, data, initial_weights, budget=budget)
         rnd_weights = np.floor(rnd_weights)
 
-        # Two-stage portfolio
-        two_weights = optimize(Optimizer.TWO_STAGE_QP, data, initial_weights, budget=budget)
-
         # Backlog calculations
-        num_weights = optimal_weights - two_weights
-        den_weights = optimal_weights - rnd_weights
-
-        num_var = num_weights.T @ data.covariance_matrix @ num_weights
-        den_var = den_weights.T @ data.covariance_matrix @ den_weights
-
-        backlog_ratio = num_var / den_var
+        backlog_ratio = backlog_risk.ratios(optimal_weights, two_weights, rnd_weights)[0]
 
         results_list.append(
             {
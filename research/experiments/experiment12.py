@@ -1,40 +1,52 @@
 import numpy as np
-import pandas as pd
 
 from research.datasets import Basic
 from research.enums import ChartType, Optimizer
-from research.optimizers import optimize
+from research.optimizers import optimize, optimize_frontier
 from research.portfolio import Portfolio
+from research.results import ResultsAccumulator
 from research.utils import chart, table
 
 data = Basic().asset_data
 budget = 1e6
 gammas = np.linspace(1, 10, 19)
 
-results_list = []
+accumulator = ResultsAccumulator(data.names)
 
 # Initial weights
 n_assets = len(data.names)
 initial_weights = np.ones(n_assets) / n_assets
 
-for gamma in gammas:
-    # Optimize portfolio
+# Continuous portfolios for every gamma from one factorization
+frontier = optimize_frontier(data, gammas)
+
+for gamma, frontier_weights in zip(frontier.gammas, frontier.weights):
+    # Optimize portfolio (two-stage portfolios are integer, one solve per gamma)
     for optimizer in [Optimizer.QP, Optimizer.TWO_STAGE_QP]:
-        weights = optimize(
-            optimizer, data, initial_weights, gamma=gamma, scale_weights=False, budget=budget
-        )
+        if optimizer == Optimizer.QP:
+            weights = frontier_weights
+        else:
+            weights = optimize(
+                optimizer, data, initial_weights, gamma=gamma, scale_weights=False, budget=budget
+            )
         portfolio = Portfolio(data, weights, budget, annualize=252)
 
-        # Create results dataframe
-        result = portfolio.metrics_df(include_weights=True)
-        result["optimizer"] = optimizer.value
-        result["weights_sum"] = sum(portfolio.weights)
-        result["gamma"] = gamma
-        new_order = ["gamma"] + [col for col in result.columns[:-1]]
-        result = result[new_order]
-        results_list.append(result)
+        # Accumulate results
+        accumulator.add_portfolio(
+            portfolio,
+            include_weights=True,
+            gamma=gamma,
+            optimizer=optimizer.value,
+            weights_sum=sum(portfolio.weights),
+        )
+
+results = accumulator.to_frame()
 
-results = pd.concat(results_list)
+# Gamma first, labels after the metrics and weights
+labels = ["optimizer", "weights_sum"]
+results = results[
+    ["gamma"] + [col for col in results.columns if col not in ["gamma", *labels]] + labels
+]
 
 table(title="Optimization outcomes for different levels of gamma", data=results)
 
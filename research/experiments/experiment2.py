@@ -2,8 +2,8 @@ import numpy as np
 import pandas as pd
 
 from research.datasets import Basic
-from research.enums import ChartType, Optimizer
-from research.optimizers import optimize
+from research.enums import ChartType
+from research.optimizers import optimize_frontier
 from research.portfolio import Portfolio
 from research.utils import chart, table
 
@@ -13,15 +13,10 @@ gammas = np.linspace(1, 10, 19)
 
 results_list = []
 
-# Initial weights
-n_assets = len(data.names)
-initial_weights = np.ones(n_assets) / n_assets
+# Optimize every portfolio on the frontier from one factorization
+frontier = optimize_frontier(data, gammas)
 
-for gamma in gammas:
-    # Optimize portfolio
-    optimal_weights = optimize(
-        Optimizer.QP, data, initial_weights, gamma=gamma, scale_weights=False
-    )
+for gamma, optimal_weights in zip(frontier.gammas, frontier.weights):
     portfolio = Portfolio(data, optimal_weights, budget, annualize=252)
 
     # Create results dataframe
@@ -1,6 +1,7 @@
 import numpy as np
 import pandas as pd
 
+from research.backlog import BacklogRisk
 from research.datasets import Basic
 from research.enums import ChartType, Optimizer, Rounding
 from research.optimizers import optimize
@@ -8,6 +9,7 @@ from research.portfolio import Portfolio
 from research.utils import chart, table
 
 data = Basic().asset_data
+backlog_risk = BacklogRisk(data, annualize=252)
 methods = [Rounding.CEIL, Rounding.FLOOR, Rounding.MID]
 budget = 1e6
 standard_optimizers = [Optimizer.QP, Optimizer.SLSQP]
@@ -55,8 +57,7 @@ for optimizer, opt_weights in zip(standard_optimizers, opt_weights_list):
         portfolio = Portfolio(data, optimal_weights, budget, annualize=252)
         rnd_weights = portfolio.round(method)
 
-        opt_m_rnd = opt_weights - rnd_weights
-        backlog = np.sqrt(opt_m_rnd.T @ data.covariance_matrix @ opt_m_rnd) * np.sqrt(252)
+        backlog = backlog_risk.risks(opt_weights, rnd_weights)[0]
 
         result = portfolio.metrics_df()
 
@@ -89,8 +90,7 @@ for optimizer, opt_weights, benchmark in zip(
     two_weights = optimize(optimizer, data, initial_weights, budget=budget)
     portfolio = Portfolio(data, two_weights, budget, annualize=252)
 
-    opt_m_two = opt_weights - two_weights
-    backlog = np.sqrt(opt_m_two.T @ data.covariance_matrix @ opt_m_two) * np.sqrt(252)
+    backlog = backlog_risk.risks(opt_weights, two_weights)[0]
 
     result = portfolio.metrics_df()
 
@@ -1,6 +1,7 @@
 import numpy as np
 import pandas as pd
 
+from research.backlog import BacklogRisk
 from research.datasets import Basic
 from research.enums import ChartType, Optimizer
 from research.interfaces import AssetData
@@ -8,6 +9,7 @@ from research.optimizers import optimize
 from research.utils import chart, table
 
 data: AssetData = Basic().asset_data
+backlog_risk = BacklogRisk(data)
 n_assets = len(data.names)
 budgets = [1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11, 1e12]
 
@@ -26,13 +28,7 @@ for budget in budgets:
     two_weights = optimize(Optimizer.TWO_STAGE_QP, data, initial_weights, budget=budget)
 
     # Backlog calculations
-    num_weights = optimal_weights - two_weights
-    den_weights = optimal_weights - rnd_weights
-
-    num_var = num_weights.T @ data.covariance_matrix @ num_weights
-    den_var = den_weights.T @ data.covariance_matrix @ den_weights
-
-    backlog_ratio = num_var / den_var
+    backlog_ratio = backlog_risk.ratios(optimal_weights, two_weights, rnd_weights)[0]
 
     results_list.append(
         {"budget": f"1e{str(int(np.log10(budget)))}", "log_backlog_ratio": np.log(backlog_ratio)}
@@ -1,23 +1,25 @@
 import matplotlib.pyplot as plt
+import pandas as pd
 import seaborn as sns
 
 from research.datasets import Historical
+from research.enums import DateSampling
 from research.utils import table
 
-historical_data = Historical().df
+historical = Historical()
 
-random_date = historical_data["date"].sample(random_state=47).iloc[0]
+random_date = pd.Timestamp(historical.sample_date(47, DateSampling.ROWS))
 
-day = historical_data[historical_data["date"] == random_date].copy().reset_index(drop=True)
+day = historical.cross_section(random_date).reset_index(drop=True)
 
 prc_data = day["prc"].describe().to_frame().reset_index().rename(columns={"index": "statistic"})
 
 table(prc_data, title="Sample of Random Date Price Data")
 
 lower_bound = day["prc"].quantile(0)
-quartile_1 = day["prc"].quantile(0.25)
-quartile_2 = day["prc"].quantile(0.50)
-quartile_3 = day["prc"].quantile(0.75)
+quartile_1 = float(day["prc"].quantile(0.25))
+quartile_2 = float(day["prc"].quantile(0.50))
+quartile_3 = float(day["prc"].quantile(0.75))
 upper_bound = day["prc"].quantile(0.99)
 
 day_subset = day[(day["prc"] >= lower_bound) & (day["prc"] <= upper_bound)]
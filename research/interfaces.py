@@ -1,20 +1,255 @@
-from dataclasses import dataclass
+import hashlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable
 
 import numpy as np
+import scipy.linalg as la
 from numpy.typing import NDArray
 
+from research.covariance import FactorCovariance
+from research.enums import Dataset, Optimizer, Rounding
 
-@dataclass
+if TYPE_CHECKING:
+    from research.optimizers.linalg import CovarianceFactor
+
+
+ASSET_DATA_FIELDS = ("names", "prices", "expected_returns", "covariance_matrix")
+
+
+def _read_only(value: Any) -> Any:
+    # Read-only view: the dataset cannot be changed in place by accident
+    if isinstance(value, FactorCovariance):
+        return value  # Already read-only
+
+    array = np.asarray(value).view()
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(slots=True, eq=False)
 class AssetData:
     """
     A dataclass to represent asset data, including:
     - Names of the assets
     - Prices of the assets
     - Expected returns for the assets
-    - Covariance matrix of the asset returns
+    - Covariance matrix of the asset returns (dense, or a low-rank FactorCovariance)
+
+    Fields are stored as read-only arrays. Derived quantities (covariance factor,
+    eigendecomposition, Σ⁻¹μ, variances, fingerprint) are computed on first use and cached;
+    assigning a field (e.g. data.prices = ...) clears the cache. Call invalidate() after
+    changing an underlying array in place.
     """
 
     names: NDArray[np.str_]  # Array of strings (asset names)
     prices: NDArray[np.float64]  # Array of floats (asset prices)
     expected_returns: NDArray[np.float64]  # Array of floats (expected returns)
-    covariance_matrix: NDArray[np.float64]  # 2D array of floats (covariance matrix)
+    covariance_matrix: NDArray[np.float64] | FactorCovariance  # 2D array or factor model
+    _cache: dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in ASSET_DATA_FIELDS:
+            value = _read_only(value)
+            if hasattr(self, "_cache"):
+                self._cache.clear()
+
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Cached factors are cheaper to recompute than to ship to worker processes
+        return {name: getattr(self, name) for name in ASSET_DATA_FIELDS}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        object.__setattr__(self, "_cache", {})
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def invalidate(self) -> None:
+        self._cache.clear()
+
+    def _cached(self, key: str, compute: Callable[[], Any]) -> Any:
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def factor(self) -> "CovarianceFactor | FactorCovariance":
+        """
+        Cholesky factor of Σ (eigendecomposition when Σ is only semidefinite). A factor
+        model is its own factorization.
+        """
+        # Imported here: research.optimizers imports this module
+        from research.optimizers.linalg import factor_covariance
+
+        covariance_matrix = self.covariance_matrix
+        if isinstance(covariance_matrix, FactorCovariance):
+            return covariance_matrix
+
+        factor: CovarianceFactor = self._cached(
+            "factor", lambda: factor_covariance(covariance_matrix)
+        )
+        return factor
+
+    @property
+    def eigh(self) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """Eigenvalues (ascending) and eigenvectors of Σ."""
+        eigh: tuple[NDArray[np.float64], NDArray[np.float64]] = self._cached(
+            "eigh",
+            lambda: tuple(_read_only(a) for a in la.eigh(np.asarray(self.covariance_matrix))),
+        )
+        return eigh
+
+    @property
+    def precision_returns(self) -> NDArray[np.float64]:
+        """Σ⁻¹μ (least-norm solution when Σ is singular)."""
+        precision_returns: NDArray[np.float64] = self._cached(
+            "precision_returns", lambda: _read_only(self.factor.solve(self.expected_returns))
+        )
+        return precision_returns
+
+    @property
+    def variances(self) -> NDArray[np.float64]:
+        """Per-asset variances, the diagonal of Σ."""
+        variances: NDArray[np.float64] = self._cached(
+            "variances", lambda: _read_only(self.covariance_matrix.diagonal().copy())
+        )
+        return variances
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable content hash of the dataset, for keying caches and sharing work."""
+
+        def digest() -> str:
+            hasher = hashlib.blake2b(digest_size=16)
+            for name in ASSET_DATA_FIELDS:
+                value = getattr(self, name)
+                arrays = (
+                    [value.exposures, value.factor_covariance, value.idiosyncratic_variances]
+                    if isinstance(value, FactorCovariance)
+                    else [value]
+                )
+                for array in arrays:
+                    array = array.astype(str) if array.dtype.kind in "OSU" else array
+                    hasher.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+                    hasher.update(np.ascontiguousarray(array).tobytes())
+            return hasher.hexdigest()
+
+        fingerprint: str = self._cached("fingerprint", digest)
+        return fingerprint
+
+
+@dataclass
+class Frontier:
+    """
+    A dataclass to represent a sweep of mean-variance portfolios, including:
+    - Risk aversion (gamma) for each point
+    - Weights for each point, one row per gamma
+    - Expected return, standard deviation and leverage (weight sum) for each point
+    """
+
+    gammas: NDArray[np.float64]  # Array of floats (risk aversion per point)
+    weights: NDArray[np.float64]  # 2D array of floats (len(gammas), n_assets)
+    expected_returns: NDArray[np.float64]  # Array of floats (expected return per point)
+    standard_deviations: NDArray[np.float64]  # Array of floats (risk per point)
+    leverage: NDArray[np.float64]  # Array of floats (sum of weights per point)
+
+
+@dataclass
+class MIQPResult:
+    """
+    A dataclass to represent an anytime MIQP solve, including:
+    - Best incumbent weights and shares
+    - Incumbent objective, proven upper bound and relative gap
+    - Backend, final status, wall-clock time and explored nodes
+    - Optional incumbent trace as (seconds, objective) pairs
+    """
+
+    weights: NDArray[np.float64]  # Array of floats (incumbent weights)
+    shares: NDArray[np.float64]  # Array of floats (incumbent shares)
+    objective: float  # μ'w - γw'Σw of the incumbent
+    bound: float  # Proven upper bound on the objective
+    gap: float  # (bound - objective) / |objective|
+    backend: str  # Solver backend that produced the incumbent
+    status: str  # Final solver status
+    solve_time: float  # Wall-clock seconds
+    nodes: int | None  # Branch-and-bound nodes explored, when reported
+    trace: list[tuple[float, float]] = field(default_factory=list)
+
+
+@dataclass
+class TaskResult:
+    """
+    A dataclass to represent one task of a batch optimization, including:
+    - Position of the task in the submitted batch
+    - Optimizer that was run
+    - Resulting weights (empty when the task failed)
+    - Captured error traceback, if any
+    - Wall-clock time spent in the worker
+    """
+
+    index: int  # Position of the task in the batch
+    optimizer: Optimizer  # Optimizer that was run
+    weights: NDArray[np.float64]  # Array of floats (optimal weights)
+    error: str | None  # Formatted traceback when the task raised
+    solve_time: float  # Wall-clock seconds
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BacktestResult:
+    """
+    A dataclass to represent a rebalanced backtest, including:
+    - Portfolio value (holdings plus cash) on each date
+    - Rebalance dates with the whole shares held and the cash left after each rebalance
+    - Wall-clock time spent in the optimizer at each rebalance
+    """
+
+    names: NDArray[np.str_]  # Array of strings (asset names)
+    dates: NDArray[np.datetime64]  # Array of dates (trading days)
+    values: NDArray[np.float64]  # Array of floats (portfolio value, NaN before the first rebalance)
+    rebalance_dates: NDArray[np.datetime64]  # Array of dates (rebalance days)
+    shares: NDArray[np.float64]  # 2D array of floats (rebalances, assets)
+    cash: NDArray[np.float64]  # Array of floats (cash after each rebalance)
+    solve_times: NDArray[np.float64]  # Array of floats (seconds per rebalance)
+
+    @property
+    def returns(self) -> NDArray[np.float64]:
+        """Daily portfolio returns from the first rebalance on."""
+        values = self.values[~np.isnan(self.values)]
+        returns: NDArray[np.float64] = values[1:] / values[:-1] - 1
+        return returns
+
+
+@dataclass
+class ExperimentSpec:
+    """
+    A dataclass to represent a declarative experiment, including:
+    - Name (also the default results file) and dataset with its constructor options
+    - Grid axes: asset counts and sample seeds (one dataset sample per pair), optimizers,
+      rounding methods, budgets and risk aversions
+    - Optional benchmark optimizer whose weights each portfolio's backlog risk is measured
+      against, and baseline optimizer (and rounding) whose backlog variance each portfolio's
+      backlog ratio is relative to
+    - Optional prices that replace the sampled asset prices
+    - Extra optimize kwargs shared by every task
+    """
+
+    name: str  # Experiment name
+    dataset: Dataset  # Dataset to sample from
+    optimizers: list[Optimizer]  # Optimizers to run
+    roundings: list[Rounding | None] = field(default_factory=lambda: [None])  # None: unrounded
+    budgets: list[float] = field(default_factory=lambda: [1e6])  # Budgets
+    gammas: list[float | None] = field(default_factory=lambda: [None])  # None: optimizer default
+    n_assets: list[int | None] = field(default_factory=lambda: [None])  # None: whole dataset
+    seeds: list[int] = field(default_factory=lambda: [0])  # Sample seeds
+    benchmark: Optimizer | None = None  # Backlog risk benchmark
+    baseline: Optimizer | None = None  # Backlog ratio baseline (needs a benchmark)
+    baseline_rounding: Rounding | None = None  # Rounding of the baseline portfolio
+    prices: list[float] | None = None  # Override the sampled asset prices
+    dataset_options: dict[str, Any] = field(default_factory=dict)  # Dataset kwargs
+    options: dict[str, Any] = field(default_factory=dict)  # Extra optimize kwargs
+    annualize: int = 252  # Periods per year for metrics
+    include_weights: bool = False  # Store weights and shares per row
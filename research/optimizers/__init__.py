@@ -1,8 +1,40 @@
+from .analytic_qp import analytic_qp
+from .backends import BACKENDS, FALLBACK_ORDER, SolverOptions, available_backends
+from .batch import optimize_many
+from .cache import ProblemCache, problem_cache
 from .engine import optimize
-from .miqp import miqp
+from .exact_second_stage import NUMPY, exact_second_stage
+from .frontier import optimize_frontier
+from .max_sharpe import max_sharpe
+from .miqp import anytime_miqp, miqp
 from .qp import qp
+from .rebalance import prune_trades, rebalance
 from .slsqp import slsqp
+from .sweep import optimize_sweep
 from .two_stage_qp import two_stage_qp
 from .two_stage_slsqp import two_stage_slsqp
 
-__all__ = ["optimize", "slsqp", "qp", "miqp", "two_stage_slsqp", "two_stage_qp"]
+__all__ = [
+    "optimize",
+    "optimize_many",
+    "optimize_sweep",
+    "optimize_frontier",
+    "slsqp",
+    "qp",
+    "analytic_qp",
+    "miqp",
+    "anytime_miqp",
+    "rebalance",
+    "prune_trades",
+    "max_sharpe",
+    "two_stage_slsqp",
+    "two_stage_qp",
+    "exact_second_stage",
+    "NUMPY",
+    "SolverOptions",
+    "BACKENDS",
+    "FALLBACK_ORDER",
+    "available_backends",
+    "ProblemCache",
+    "problem_cache",
+]
@@ -0,0 +1,17 @@
+import numpy as np
+from numpy.typing import NDArray
+
+from research.interfaces import AssetData
+
+from .linalg import check_bounded
+
+
+def analytic_qp(data: AssetData, gamma: float, scale_weights: bool = False) -> NDArray[np.float64]:
+    # A singular Σ with μ outside its range has a riskless direction with positive return
+    check_bounded(data.factor, data.expected_returns)
+
+    # max μ'w - γ w'Σw  =>  w = Σ⁻¹μ / 2γ
+    optimal_weights = data.precision_returns / (2 * gamma)
+
+    total_value = np.sum(optimal_weights)
+    return optimal_weights / total_value if scale_weights else optimal_weights
@@ -0,0 +1,181 @@
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, Callable
+
+import cvxpy as cp
+import numpy as np
+from numpy.typing import NDArray
+
+from .cache import CachedProblem, problem_cache
+from .exact_second_stage import NUMPY
+
+
+@cache
+def installed_solvers() -> frozenset[str]:
+    # Probing every solver imports its package, so only do it once per process
+    return frozenset(cp.installed_solvers())  # type: ignore[no-untyped-call]
+
+
+@dataclass
+class SolverOptions:
+    """
+    Per-call solver options, translated to each backend's own parameter names:
+    - Number of threads
+    - Wall-clock time limit in seconds
+    - Relative MIP gap at which to stop
+    - Branch-and-bound node limit
+    """
+
+    threads: int | None = None
+    time_limit: float | None = None
+    mip_gap: float | None = None
+    node_limit: int | None = None
+
+
+@dataclass
+class Backend:
+    """
+    A solver backend: its cvxpy solver name (None for the built-in solver), whether it
+    can solve mixed-integer problems with a quadratic objective and whether cvxpy passes
+    initial variable values to it as a MIP start.
+    """
+
+    name: str
+    solver: str | None
+    mixed_integer_quadratic: bool
+    mip_start: bool
+
+    def available(self) -> bool:
+        return self.solver is None or self.solver in installed_solvers()
+
+    def solver_kwargs(self, options: SolverOptions) -> dict[str, Any]:
+        match self.name:
+            case "GUROBI":
+                params = {
+                    "Threads": options.threads,
+                    "TimeLimit": options.time_limit,
+                    "MIPGap": options.mip_gap,
+                    "NodeLimit": options.node_limit,
+                }
+                return {key: value for key, value in params.items() if value is not None}
+
+            case "SCIP":
+                params = {
+                    "lp/threads": options.threads,
+                    "limits/time": options.time_limit,
+                    "limits/gap": options.mip_gap,
+                    "limits/nodes": options.node_limit,
+                }
+                scip_params = {key: value for key, value in params.items() if value is not None}
+                return {"scip_params": scip_params} if scip_params else {}
+
+            case "HIGHS":
+                params = {
+                    "threads": options.threads,
+                    "time_limit": options.time_limit,
+                    "mip_rel_gap": options.mip_gap,
+                    "mip_max_nodes": options.node_limit,
+                }
+                return {key: value for key, value in params.items() if value is not None}
+
+        return {}
+
+
+BACKENDS: dict[str, Backend] = {
+    "GUROBI": Backend("GUROBI", cp.GUROBI, True, True),
+    "SCIP": Backend("SCIP", cp.SCIP, True, False),
+    "HIGHS": Backend("HIGHS", cp.HIGHS, False, False),
+    NUMPY: Backend(NUMPY, None, True, True),
+}
+
+# Order in which backends are tried when no solver is requested. HiGHS has no
+# mixed-integer quadratic support, so it is left out and only used when requested.
+FALLBACK_ORDER: list[str] = ["GUROBI", "SCIP", NUMPY]
+
+
+def available_backends() -> list[str]:
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def backend_order(solver: str | list[str] | None) -> list[str]:
+    if solver is None:
+        return FALLBACK_ORDER
+
+    names = [solver] if isinstance(solver, str) else solver
+    for name in names:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown solver backend {name}, expected one of {list(BACKENDS)}")
+
+    return names
+
+
+def feasible_start(
+    prices: NDArray[np.float64], budget: float, shares: NDArray[np.float64] | None
+) -> NDArray[np.float64] | None:
+    """Round a warm-start share vector to whole shares, or drop it if it exceeds the budget."""
+    if shares is None:
+        return None
+
+    shares = np.round(np.asarray(shares, dtype=np.float64))
+    if shares @ prices > budget:
+        return None
+
+    return shares
+
+
+def solve_with_fallback(
+    optimizer: str,
+    n_assets: int,
+    build: Callable[[int], CachedProblem],
+    values: dict[str, Any],
+    solver: str | list[str] | None = None,
+    options: SolverOptions | None = None,
+    mixed_integer_quadratic: bool = True,
+    initial: dict[str, Any] | None = None,
+) -> tuple[CachedProblem | None, str]:
+    """
+    Solve a cached parametric problem with the first backend that is installed and succeeds.
+
+    Returns the solved problem and the backend name. The problem is None when the built-in
+    backend is reached, so the caller runs its own solver. Initial variable values are passed
+    to the solver as a MIP start only where cvxpy supports one (Gurobi); other backends
+    start cold.
+    """
+    options = options or SolverOptions()
+    errors = []
+
+    for name in backend_order(solver):
+        backend = BACKENDS[name]
+
+        if backend.solver is None:
+            return None, name
+
+        if not backend.available():
+            errors.append(f"{name}: not installed")
+            continue
+
+        if mixed_integer_quadratic and not backend.mixed_integer_quadratic:
+            errors.append(f"{name}: cannot solve mixed-integer quadratic problems")
+            continue
+
+        cached = problem_cache.get(optimizer, n_assets, backend.solver, build)
+        kwargs = backend.solver_kwargs(options)
+        if initial is not None and backend.mip_start:
+            for variable, value in initial.items():
+                cached.variables[variable].value = value
+            kwargs["warm_start"] = True
+
+        try:
+            cached.solve(values, solver=backend.solver, **kwargs)
+        # Backend errors (e.g. a Gurobi license error) fall through to the next backend
+        except Exception as error:
+            errors.append(f"{name}: {type(error).__name__}: {error}")
+            continue
+
+        # Any incumbent counts, including one returned at a time limit
+        if all(variable.value is not None for variable in cached.variables.values()):
+            return cached, name
+
+        errors.append(f"{name}: finished with status {cached.problem.status}")
+
+    raise cp.SolverError("No solver backend succeeded:\n" + "\n".join(errors))
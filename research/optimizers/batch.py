@@ -0,0 +1,86 @@
+import time
+import traceback
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
+from typing import Any
+
+import numpy as np
+
+from research.enums import Optimizer
+from research.interfaces import AssetData, TaskResult
+
+from .engine import optimize
+
+Task = tuple[Optimizer, AssetData, dict[str, Any]]
+
+
+def _run_task(index: int, task: Task) -> TaskResult:
+    optimizer, data, kwargs = task
+    kwargs = dict(kwargs)
+
+    # Initial weights default to equal weights, as in the experiments
+    n_assets = len(data.expected_returns)
+    weights = kwargs.pop("weights", np.ones(n_assets) / n_assets)
+
+    start = time.perf_counter()
+    try:
+        result = optimize(optimizer, data, weights, **kwargs)
+        error = None
+    except Exception:
+        result = np.array([])
+        error = traceback.format_exc()
+
+    return TaskResult(index, optimizer, result, error, time.perf_counter() - start)
+
+
+def _run_chunk(chunk: list[tuple[int, Task]]) -> list[TaskResult]:
+    return [_run_task(index, task) for index, task in chunk]
+
+
+def _chunks(tasks: Iterable[Task], chunksize: int) -> Iterator[list[tuple[int, Task]]]:
+    chunk: list[tuple[int, Task]] = []
+    for index, task in enumerate(tasks):
+        chunk.append((index, task))
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def optimize_many(
+    tasks: Iterable[Task],
+    max_workers: int | None = None,
+    chunksize: int = 1,
+    ordered: bool = True,
+    executor: Executor | None = None,
+) -> Iterator[TaskResult]:
+    """
+    Run (optimizer, data, kwargs) tasks in a process pool and stream TaskResults.
+
+    Tasks are sent to workers in chunks of `chunksize`. With `ordered` results come back in
+    submission order, otherwise as soon as each chunk finishes. Exceptions raised by a task are
+    captured on its TaskResult instead of aborting the batch. `max_workers=1` runs in-process.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+
+    chunks = _chunks(tasks, chunksize)
+
+    # Serial path (debugging, profiling or already inside a worker)
+    if executor is None and max_workers == 1:
+        for chunk in chunks:
+            yield from _run_chunk(chunk)
+        return
+
+    pool = executor or ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures: list[Future[list[TaskResult]]] = [
+            pool.submit(_run_chunk, chunk) for chunk in chunks
+        ]
+        for future in futures if ordered else as_completed(futures):
+            yield from future.result()
+    finally:
+        # Only shut down pools we created; cancel pending work if the consumer stops early
+        if executor is None:
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import cvxpy as cp
+import numpy as np
+from numpy.typing import NDArray
+
+
+@dataclass
+class CachedProblem:
+    """
+    A compiled-once, DPP-compliant cvxpy problem whose data enters as parameters:
+    - The cvxpy problem itself
+    - Named variables to read solutions from
+    - Named parameters to swap data into between solves
+    """
+
+    problem: cp.Problem
+    variables: dict[str, cp.Variable]
+    parameters: dict[str, cp.Parameter]
+
+    def solve(self, values: dict[str, Any], **kwargs: Any) -> None:
+        for name, value in values.items():
+            self.parameters[name].value = value
+
+        self.problem.solve(**kwargs)  # type: ignore[no-untyped-call]
+
+    def solution(self, name: str, backend: str | None = None) -> NDArray[np.float64]:
+        """Read a variable's value after a solve, raising when the solver returned none."""
+        value = self.variables[name].value
+        if value is None:
+            raise cp.SolverError(
+                f"{backend or 'cvxpy'} returned no {name} (status {self.problem.status})"
+            )
+
+        solution: NDArray[np.float64] = value
+        return solution
+
+
+class ProblemCache:
+    """
+    LRU cache of parametric problems keyed by (optimizer, n_assets, solver).
+    """
+
+    def __init__(self, maxsize: int = 16) -> None:
+        self.maxsize = maxsize
+        self._problems: OrderedDict[tuple[str, int, str | None], CachedProblem] = OrderedDict()
+
+    def get(
+        self,
+        optimizer: str,
+        n_assets: int,
+        solver: str | None,
+        build: Callable[[int], CachedProblem],
+    ) -> CachedProblem:
+        key = (optimizer, n_assets, solver)
+
+        if key in self._problems:
+            self._problems.move_to_end(key)
+            return self._problems[key]
+
+        cached = build(n_assets)
+        self._problems[key] = cached
+
+        # Evict least recently used problems
+        while len(self._problems) > self.maxsize:
+            self._problems.popitem(last=False)
+
+        return cached
+
+    def clear(self) -> None:
+        self._problems.clear()
+
+    def __len__(self) -> int:
+        return len(self._problems)
+
+
+problem_cache = ProblemCache()
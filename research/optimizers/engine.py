@@ -6,37 +6,105 @@ from numpy.typing import NDArray
 from research.enums import Optimizer
 from research.interfaces import AssetData
 
+from .analytic_qp import analytic_qp
+from .backends import SolverOptions
+from .local_search import local_search
+from .max_sharpe import max_sharpe
 from .miqp import miqp
-from .qp import qp
+from .rebalance import rebalance
 from .slsqp import slsqp
 from .two_stage_qp import two_stage_qp
 from .two_stage_slsqp import two_stage_slsqp
 
+# Integer optimizers whose objective is the mean-variance utility local search improves
+POLISHABLE = (Optimizer.TWO_STAGE_QP, Optimizer.MIQP)
+
 
 def optimize(
     optimizer: Optimizer, data: AssetData, weights: np.ndarray, **kwargs: Any
 ) -> NDArray[np.float64]:
 
     # Default kwargs
-    budget = kwargs.get("budget", None)
+    budget: float | None = kwargs.get("budget", None)
     gamma = kwargs.get("gamma", 2)
     scale_weights = kwargs.get("scale_weights", True)
+    solver = kwargs.get("solver", None)
+    long_only = kwargs.get("long_only", False)
+    max_weight = kwargs.get("max_weight", None)
+    tol = kwargs.get("tol", None)
+    maxiter = kwargs.get("maxiter", 100)
+    polish = kwargs.get("polish", False)
+    invest_cash = kwargs.get("invest_cash", False)  # Spend leftover cash after polishing
+    initial_shares = kwargs.get("initial_shares", None)  # Warm start for integer optimizers
+    current_shares = kwargs.get("current_shares", None)  # Holdings to rebalance from
+    costs = kwargs.get("costs", 0.0)
+    max_turnover = kwargs.get("max_turnover", None)
+
+    # Solver backend (name, list of names or None for the fallback order) and its options
+    options = SolverOptions(
+        threads=kwargs.get("threads", None),
+        time_limit=kwargs.get("time_limit", None),
+        mip_gap=kwargs.get("mip_gap", None),
+        node_limit=kwargs.get("node_limit", None),
+    )
+
+    if polish and optimizer not in POLISHABLE:
+        raise ValueError(f"Polish improves the mean-variance utility, not {optimizer.value}")
 
     match optimizer:
 
         case Optimizer.SLSQP:
-            return slsqp(data, weights)
+            return slsqp(data, weights, tol=tol, maxiter=maxiter)
 
         case Optimizer.QP:
-            return qp(data, gamma, scale_weights)
+            return analytic_qp(data, gamma, scale_weights)
+
+        case Optimizer.MAX_SHARPE:
+            return max_sharpe(data, long_only, max_weight, solver)
+
+        case Optimizer.GA:
+            return np.array([])
+
+    # Integer optimizers allocate whole shares of a budget
+    if budget is None:
+        raise ValueError(f"The {optimizer.value} optimizer needs a budget")
+
+    match optimizer:
 
         case Optimizer.TWO_STAGE_SLSQP:
-            return two_stage_slsqp(data, weights, budget)
+            integer_weights = two_stage_slsqp(
+                data,
+                weights,
+                budget,
+                solver,
+                options,
+                tol=tol,
+                maxiter=maxiter,
+                initial_shares=initial_shares,
+            )
 
         case Optimizer.TWO_STAGE_QP:
-            return two_stage_qp(data, gamma, budget, scale_weights)
+            integer_weights = two_stage_qp(
+                data, gamma, budget, scale_weights, solver, options, initial_shares
+            )
 
         case Optimizer.MIQP:
-            return miqp(data, gamma, budget)
+            integer_weights = miqp(data, gamma, budget, solver, options, initial_shares)
+
+        case Optimizer.REBALANCE:
+            if current_shares is None:
+                raise ValueError("The rebalance optimizer needs current_shares")
+            integer_weights = rebalance(
+                data, gamma, budget, current_shares, costs, max_turnover, solver, options
+            )
+
+        case _:
+            return np.array([])
+
+    # Optional local-search polish of integer portfolios
+    if polish:
+        shares = np.round(integer_weights * budget / data.prices)
+        shares = local_search(data, shares, gamma, budget, invest_cash=invest_cash)
+        return shares * data.prices / budget
 
-    return np.array([])
+    return integer_weights
@@ -0,0 +1,210 @@
+import heapq
+import warnings
+from typing import Iterator
+
+import numpy as np
+from numpy.typing import NDArray
+
+NUMPY = "NUMPY"  # Solver name that selects the built-in exact solver in second_stage
+
+
+def _lagrangian_shares(
+    target_shares: NDArray[np.float64], prices: NDArray[np.float64], multiplier: float
+) -> NDArray[np.float64]:
+    # argmin_s p²(s - t)² + λps over the integers, per asset
+    shares: NDArray[np.float64] = np.round(target_shares - multiplier / (2 * prices))
+    return shares
+
+
+def _multiplier_bracket(
+    target_shares: NDArray[np.float64],
+    prices: NDArray[np.float64],
+    budget: float,
+    iterations: int = 50,
+) -> tuple[float, float]:
+    """Bisect for the budget multiplier: the separable solution is infeasible at low, feasible at high."""
+    low = 0.0
+    high = max(2 * float(target_shares @ prices + np.sum(prices) / 2 - budget) / len(prices), 1e-12)
+    while _lagrangian_shares(target_shares, prices, high) @ prices > budget:
+        high *= 2
+
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        if _lagrangian_shares(target_shares, prices, middle) @ prices > budget:
+            low = middle
+        else:
+            high = middle
+
+    return low, high
+
+
+def _lagrangian_bound(
+    target_shares: NDArray[np.float64], prices: NDArray[np.float64], budget: float
+) -> tuple[float, float, bool]:
+    """
+    Lower bound on min Σp²(s - t)² s.t. Σps <= budget over integer shares.
+
+    Returns the bound, a feasible budget multiplier and whether the multiplier is
+    zero (nearest-share rounding fits, so the bound is attained).
+    """
+    tolerance = 1e-9 * max(abs(budget), 1.0)
+
+    if len(prices) == 0:
+        return (0.0 if budget >= -tolerance else np.inf), 0.0, True
+
+    shares = np.round(target_shares)
+    if shares @ prices <= budget + tolerance:
+        return float(np.sum((prices * (shares - target_shares)) ** 2)), 0.0, True
+
+    def dual(multiplier: float) -> float:
+        shares = _lagrangian_shares(target_shares, prices, multiplier)
+        cost = np.sum((prices * (shares - target_shares)) ** 2)
+        return float(cost + multiplier * (shares @ prices - budget))
+
+    # The dual is concave in the multiplier with subgradient Σps(λ) - budget
+    low, high = _multiplier_bracket(target_shares, prices, budget)
+
+    return max(dual(low), dual(high)), high, False
+
+
+def greedy_second_stage(
+    optimal_values: NDArray[np.float64], prices: NDArray[np.float64], budget: float
+) -> NDArray[np.float64]:
+    """
+    Feasible whole-share allocation from the Lagrangian solution plus a greedy
+    fill of the leftover cash.
+    """
+    target_shares = optimal_values / prices
+    _, multiplier, _ = _lagrangian_bound(target_shares, prices, budget)
+
+    shares = _lagrangian_shares(target_shares, prices, multiplier)
+    cash = budget - shares @ prices
+
+    # Buying one share of i changes the objective by p²(1 + 2(s - t))
+    heap = [
+        (prices[i] ** 2 * (1 + 2 * (shares[i] - target_shares[i])), i) for i in range(len(prices))
+    ]
+    heapq.heapify(heap)
+
+    while heap:
+        change, i = heapq.heappop(heap)
+        if change >= 0:
+            break
+
+        if prices[i] > cash:
+            continue
+
+        shares[i] += 1
+        cash -= prices[i]
+        heapq.heappush(heap, (change + 2 * prices[i] ** 2, i))
+
+    return shares
+
+
+def exact_second_stage(
+    optimal_values: NDArray[np.float64],
+    prices: NDArray[np.float64],
+    budget: float,
+    max_nodes: int | None = None,
+    initial_shares: NDArray[np.float64] | None = None,
+) -> NDArray[np.float64]:
+    """
+    Solve min Σ(vᵢ - sᵢpᵢ)² s.t. Σsᵢpᵢ <= budget over integer shares without a MIP solver.
+
+    Depth-first branch-and-bound over assets (most expensive first) with the separable
+    Lagrangian bound, seeded with the better of the greedy allocation and a feasible
+    initial_shares. Nearest-share rounding is returned immediately when it fits the
+    budget. With a max_nodes limit the search may stop early; the best allocation found so
+    far is then returned with a warning that it may not be optimal.
+    """
+    target_shares = optimal_values / prices
+
+    # Nearest-share rounding is optimal whenever it is feasible
+    nearest = np.round(target_shares)
+    if nearest @ prices <= budget:
+        return nearest
+
+    order = np.argsort(-prices)
+    target = target_shares[order]
+    sorted_prices = prices[order]
+    n_assets = len(prices)
+
+    incumbent = greedy_second_stage(optimal_values, prices, budget)[order]
+    best_cost = float(np.sum((sorted_prices * (incumbent - target)) ** 2))
+
+    if initial_shares is not None and initial_shares @ prices <= budget:
+        initial = np.asarray(initial_shares, dtype=np.float64)[order]
+        initial_cost = float(np.sum((sorted_prices * (initial - target)) ** 2))
+        if initial_cost < best_cost:
+            incumbent, best_cost = initial, initial_cost
+
+    tolerance = 1e-9 * max(best_cost, 1.0)
+
+    path = np.zeros(n_assets)
+    nodes = 0
+
+    def children(
+        depth: int, residual: float, fixed_cost: float, multiplier: float
+    ) -> Iterator[tuple[int, float, float, float, float, bool]]:
+        # Child bounds are convex in the branching value, so search outward from the
+        # Lagrangian value and stop in each direction once the bound is rising past the incumbent
+        price, target_share = sorted_prices[depth], target[depth]
+        center = np.round(target_share - multiplier / (2 * price))
+
+        for step in (-1, 1):
+            previous = np.inf
+            value = center if step == -1 else center + 1
+
+            while True:
+                child_residual = residual - price * value
+                child_cost = fixed_cost + (price * (value - target_share)) ** 2
+                bound, child_multiplier, attained = _lagrangian_bound(
+                    target[depth + 1 :], sorted_prices[depth + 1 :], child_residual
+                )
+                total = child_cost + bound
+
+                if total >= best_cost - tolerance and total >= previous:
+                    break
+
+                path[depth] = value
+                yield depth + 1, child_residual, child_cost, child_multiplier, total, attained
+
+                previous = total
+                value += step
+
+    _, root_multiplier, _ = _lagrangian_bound(target, sorted_prices, budget)
+    stack = [children(0, budget, 0.0, root_multiplier)]
+
+    while stack:
+        if max_nodes is not None and nodes >= max_nodes:
+            warnings.warn(
+                f"Second stage stopped at the node limit ({max_nodes}), "
+                "returning the best allocation found, which may not be optimal",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            break
+
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            continue
+
+        nodes += 1
+        depth, residual, fixed_cost, multiplier, total, attained = child
+
+        if total >= best_cost - tolerance:
+            continue
+
+        # Nearest-share rounding of the free assets fits: this subtree is solved
+        if attained:
+            best_cost = total
+            incumbent = np.concatenate([path[:depth], np.round(target[depth:])])
+            continue
+
+        stack.append(children(depth, residual, fixed_cost, multiplier))
+
+    shares = np.empty(n_assets)
+    shares[order] = incumbent
+
+    return shares
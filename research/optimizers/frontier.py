@@ -0,0 +1,36 @@
+import numpy as np
+from numpy.typing import NDArray
+
+from research.interfaces import AssetData, Frontier
+
+from .linalg import check_bounded
+
+
+def optimize_frontier(
+    data: AssetData, gammas: NDArray[np.float64], scale_weights: bool = False
+) -> Frontier:
+    gammas = np.asarray(gammas, dtype=np.float64)
+    if np.any(gammas <= 0):
+        raise ValueError(f"Gammas must be positive, got {gammas[gammas <= 0]}")
+
+    # A singular Σ with μ outside its range has a riskless direction with positive return
+    check_bounded(data.factor, data.expected_returns)
+
+    # Every frontier point is a multiple of the same direction Σ⁻¹μ
+    direction = data.precision_returns
+
+    direction_return = direction @ data.expected_returns  # μ'Σ⁻¹μ = x'Σx
+    direction_sum = np.sum(direction)
+
+    if scale_weights:
+        multipliers = np.full_like(gammas, 1 / direction_sum)
+    else:
+        multipliers = 1 / (2 * gammas)
+
+    return Frontier(
+        gammas=gammas,
+        weights=np.outer(multipliers, direction),
+        expected_returns=direction_return * multipliers,
+        standard_deviations=np.sqrt(direction_return) * np.abs(multipliers),
+        leverage=direction_sum * multipliers,
+    )
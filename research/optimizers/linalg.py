@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.linalg as la
+from numpy.typing import NDArray
+
+from research.covariance import FactorCovariance
+
+
+@dataclass
+class CovarianceFactor:
+    """
+    A factorization of a covariance matrix that can be reused across solves:
+    - Cholesky factor when the matrix is positive definite
+    - Eigendecomposition (pseudo-inverse) when it is only semidefinite
+    """
+
+    kind: str  # "cholesky" or "eigen"
+    factor: NDArray[np.float64]  # Lower Cholesky factor or eigenvectors
+    eigenvalues: NDArray[np.float64] | None = None  # Clipped eigenvalues (eigen only)
+
+    def solve(self, rhs: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Solve Σx = rhs (least-norm solution when Σ is singular)."""
+        if self.kind == "cholesky":
+            solution: NDArray[np.float64] = la.cho_solve((self.factor, True), rhs)
+            return solution
+
+        assert self.eigenvalues is not None
+        inverse = np.zeros_like(self.eigenvalues)
+        nonzero = self.eigenvalues > 0
+        inverse[nonzero] = 1 / self.eigenvalues[nonzero]
+        projected = self.factor.T @ rhs
+        scaled = projected * (inverse[:, None] if projected.ndim > 1 else inverse)
+        return self.factor @ scaled
+
+    def in_range(self, rhs: NDArray[np.float64], tolerance: float = 1e-8) -> bool:
+        """Whether rhs lies in the range of Σ, i.e. Σx = rhs has an exact solution."""
+        if self.kind == "cholesky":
+            return True
+
+        assert self.eigenvalues is not None
+        null_space = self.factor[:, self.eigenvalues == 0]
+        residual = np.linalg.norm(null_space.T @ rhs)
+        return bool(residual <= tolerance * max(float(np.linalg.norm(rhs)), 1.0))
+
+    def root(self) -> NDArray[np.float64]:
+        """Return L such that Σ = L @ L.T."""
+        if self.kind == "cholesky":
+            return self.factor
+
+        assert self.eigenvalues is not None
+        return self.factor * np.sqrt(self.eigenvalues)
+
+
+def factor_covariance(
+    covariance_matrix: NDArray[np.float64], tolerance: float = 1e-12
+) -> CovarianceFactor:
+    # Positive definite: Cholesky
+    try:
+        lower = la.cholesky(covariance_matrix, lower=True)
+        return CovarianceFactor("cholesky", lower)
+    except la.LinAlgError:
+        pass
+
+    # Semidefinite: eigendecomposition with tiny/negative eigenvalues clipped to zero
+    eigenvalues, eigenvectors = la.eigh(covariance_matrix)
+    cutoff = tolerance * max(float(np.max(np.abs(eigenvalues))), 1.0)
+    eigenvalues = np.where(eigenvalues > cutoff, eigenvalues, 0.0)
+
+    return CovarianceFactor("eigen", eigenvectors, eigenvalues)
+
+
+def risk_roots(
+    factor: CovarianceFactor | FactorCovariance,
+) -> tuple[NDArray[np.float64], NDArray[np.float64] | None]:
+    """
+    Split Σ = R'R + diag(d)² for solver models: R = L' (n x n) and no d for a dense
+    covariance, R = G' (k x n) and d = √D for a factor model, so models stay k-dimensional.
+    """
+    if isinstance(factor, FactorCovariance):
+        return factor.factor_root.T, np.sqrt(factor.idiosyncratic_variances)
+
+    return factor.root().T, None
+
+
+def check_bounded(
+    factor: CovarianceFactor | FactorCovariance, expected_returns: NDArray[np.float64]
+) -> None:
+    """
+    Raise when μ is outside the range of a singular Σ: some riskless direction then has a
+    positive return and mean-variance objectives are unbounded. Factor models are definite.
+    """
+    if not isinstance(factor, FactorCovariance) and not factor.in_range(expected_returns):
+        raise ValueError(
+            "Expected returns are not in the range of the singular covariance: unbounded"
+        )
@@ -0,0 +1,116 @@
+import numpy as np
+from numpy.typing import NDArray
+
+from research.covariance import covariance_block
+from research.interfaces import AssetData
+
+
+def _top(values: NDArray[np.float64], count: int) -> NDArray[np.intp]:
+    # Indices of the `count` largest values, in no particular order
+    if count >= len(values):
+        return np.arange(len(values))
+    return np.argpartition(values, -count)[-count:]
+
+
+def local_search(
+    data: AssetData,
+    shares: NDArray[np.float64],
+    gamma: float,
+    budget: float,
+    max_iterations: int = 10_000,
+    invest_cash: bool = False,
+    swap_candidates: int = 32,
+) -> NDArray[np.float64]:
+    """
+    Improve an integer portfolio for μ'w - γw'Σw (w = shares * prices / budget) within budget.
+
+    Moves are ±1 share, taking the best improving move each iteration, and pairwise swaps
+    (sell one share, buy one share) once no single move improves. Swaps pair the
+    swap_candidates best sells with the swap_candidates best affordable buys, so a swap scan
+    costs O(n + k²) rather than O(n²). Σw is updated from one covariance column per move
+    (O(nk) for a factor model).
+    With invest_cash, leftover cash is then spent greedily on the purchases that hurt the
+    objective least.
+    """
+    shares = np.array(shares, dtype=np.float64)
+    covariance = data.covariance_matrix  # Dense or factor model, never densified
+    assets = np.arange(len(shares))
+    scale = data.prices / budget  # weight of one share
+
+    weights = shares * scale
+    covariance_weights = covariance @ weights
+    cash = budget - shares @ data.prices
+
+    variances = data.variances
+    tolerance = 1e-12
+
+    def single_changes(direction: float) -> NDArray[np.float64]:
+        # Δf of moving each asset by ±1 share
+        step = direction * scale
+        changes: NDArray[np.float64] = step * data.expected_returns - gamma * (
+            2 * step * covariance_weights + step**2 * variances
+        )
+        return changes
+
+    def apply(asset: int, direction: float) -> None:
+        nonlocal cash
+        shares[asset] += direction
+        cash -= direction * data.prices[asset]
+        column = covariance_block(covariance, assets, np.array([asset]))[:, 0]
+        covariance_weights[:] += direction * scale[asset] * column
+
+    for _ in range(max_iterations):
+        buys = single_changes(1.0)
+        sells = single_changes(-1.0)
+
+        # Best single move
+        affordable = data.prices <= cash
+        best_buy = np.where(affordable, buys, -np.inf)
+        buy = int(np.argmax(best_buy))
+        sell = int(np.argmax(sells))
+
+        best_change = max(best_buy[buy], sells[sell])
+        move: list[tuple[int, float]] = (
+            [(buy, 1.0)] if best_buy[buy] >= sells[sell] else [(sell, -1.0)]
+        )
+
+        # Best swap (sell one share of i to buy one share of j) among the best single sells
+        # and buys, only scanned once no single move improves
+        if best_change <= tolerance:
+            sell_candidates = _top(sells, swap_candidates)
+            max_proceeds = cash + np.max(data.prices[sell_candidates])
+            buy_candidates = _top(
+                np.where(data.prices <= max_proceeds, buys, -np.inf), swap_candidates
+            )
+
+            # Δf of a swap is the two single changes plus the cross term 2γ s_i s_j Σ_ij
+            pair_scale = 2 * gamma * np.outer(scale[sell_candidates], scale[buy_candidates])
+            pair_changes = pair_scale * covariance_block(
+                covariance, sell_candidates, buy_candidates
+            )
+            swaps = sells[sell_candidates, None] + buys[None, buy_candidates] + pair_changes
+            swaps[
+                (data.prices[None, buy_candidates] > cash + data.prices[sell_candidates, None])
+                | (sell_candidates[:, None] == buy_candidates[None, :])
+            ] = -np.inf
+
+            swap_sell, swap_buy = np.unravel_index(int(np.argmax(swaps)), swaps.shape)
+            best_change = swaps[swap_sell, swap_buy]
+            move = [(int(sell_candidates[swap_sell]), -1.0), (int(buy_candidates[swap_buy]), 1.0)]
+
+        if best_change <= tolerance:
+            break
+
+        for asset, direction in move:
+            apply(asset, direction)
+
+    # Leftover-cash fill: least harmful purchases first
+    while invest_cash:
+        buys = np.where(data.prices <= cash, single_changes(1.0), -np.inf)
+        buy = int(np.argmax(buys))
+        if not np.isfinite(buys[buy]):
+            break
+
+        apply(buy, 1.0)
+
+    return shares
@@ -0,0 +1,111 @@
+from typing import Callable
+
+import cvxpy as cp
+import numpy as np
+from numpy.typing import NDArray
+
+from research.interfaces import AssetData
+
+from .cache import CachedProblem, problem_cache
+from .linalg import check_bounded, risk_roots
+
+
+def _max_sharpe_builder(
+    long_only: bool, capped: bool, factors: int | None = None, net_short: bool = False
+) -> Callable[[int], CachedProblem]:
+
+    def build(n_assets: int) -> CachedProblem:
+        # Homogenized problem: min y'Σy s.t. μ'y = 1, then w = y / |sum(y)|
+        scaled_weights = cp.Variable(n_assets)
+        total = -cp.sum(scaled_weights) if net_short else cp.sum(scaled_weights)  # |sum(y)|
+
+        expected_returns = cp.Parameter(n_assets)
+        risk_root = cp.Parameter((factors or n_assets, n_assets))  # R where Σ = R'R (+ D)
+        max_weight = cp.Parameter(nonneg=True)
+
+        variance = cp.sum_squares(risk_root @ scaled_weights)
+
+        parameters = {
+            "expected_returns": expected_returns,
+            "risk_root": risk_root,
+            "max_weight": max_weight,
+        }
+
+        # Factor model: k-dimensional risk plus a diagonal idiosyncratic term
+        if factors is not None:
+            idiosyncratic_root = cp.Parameter(n_assets, nonneg=True)  # √D
+            variance += cp.sum_squares(cp.multiply(idiosyncratic_root, scaled_weights))
+            parameters["idiosyncratic_root"] = idiosyncratic_root
+
+        objective = cp.Minimize(variance)
+
+        constraints = [expected_returns @ scaled_weights == 1]
+        if long_only:
+            constraints.append(scaled_weights >= 0)
+        if capped:
+            # w <= max_weight is y <= max_weight * |sum(y)| on the side of the sum's sign
+            constraints += [total >= 0, scaled_weights <= max_weight * total]
+
+        problem = cp.Problem(objective, constraints)
+
+        return CachedProblem(problem, {"scaled_weights": scaled_weights}, parameters)
+
+    return build
+
+
+def max_sharpe(
+    data: AssetData,
+    long_only: bool = False,
+    max_weight: float | None = None,
+    solver: str | None = None,
+) -> NDArray[np.float64]:
+    factor = data.factor
+
+    # Unconstrained: tangency portfolio w = Σ⁻¹μ / |1'Σ⁻¹μ|
+    # (normalizing by the absolute sum keeps the positive-Sharpe direction for net-short solutions)
+    if not long_only and max_weight is None:
+        # A singular Σ with μ outside its range has a riskless direction: Sharpe is unbounded
+        check_bounded(factor, data.expected_returns)
+        direction = factor.solve(data.expected_returns)
+        tangency_weights: NDArray[np.float64] = direction / np.abs(np.sum(direction))
+        return tangency_weights
+
+    n_assets = len(data.names)
+    capped = max_weight is not None
+    risk_root, idiosyncratic_root = risk_roots(factor)
+    factors = None if idiosyncratic_root is None else len(risk_root)
+
+    values = {
+        "expected_returns": data.expected_returns,
+        "risk_root": risk_root,
+        "max_weight": max_weight if capped else 1.0,
+    }
+    if idiosyncratic_root is not None:
+        values["idiosyncratic_root"] = idiosyncratic_root
+
+    # Long-only solutions are net long; otherwise the cap depends on the sign of sum(y), so
+    # solve both sides and keep the lower variance (Sharpe = 1 / σ(y) since μ'y = 1)
+    best_variance, scaled_weights = np.inf, None
+    for net_short in [False] if long_only or not capped else [False, True]:
+        cached = problem_cache.get(
+            f"max_sharpe(long_only={long_only}, capped={capped}, factors={factors}, "
+            f"net_short={net_short})",
+            n_assets,
+            solver,
+            _max_sharpe_builder(long_only, capped, factors, net_short),
+        )
+        cached.solve(values, solver=solver)
+
+        solution = cached.variables["scaled_weights"].value
+        variance = cached.problem.value
+        if solution is not None and cached.problem.status in cp.settings.SOLUTION_PRESENT:
+            if variance < best_variance:
+                best_variance, scaled_weights = variance, solution
+
+    # E.g. long-only with every expected return negative: no portfolio has μ'w > 0
+    if scaled_weights is None or np.isclose(np.sum(scaled_weights), 0):
+        raise ValueError("No portfolio with positive expected return satisfies the constraints")
+
+    optimal_weights: NDArray[np.float64] = scaled_weights / np.abs(np.sum(scaled_weights))
+
+    return optimal_weights
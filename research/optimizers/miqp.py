@@ -1,30 +1,272 @@
+import time
+from dataclasses import replace
+from functools import partial
+from typing import Any
+
 import cvxpy as cp
 import numpy as np
 from numpy.typing import NDArray
 
-from research.interfaces import AssetData
+from research.interfaces import AssetData, MIQPResult
 
+from .analytic_qp import analytic_qp
+from .backends import SolverOptions, feasible_start, solve_with_fallback
+from .cache import CachedProblem
+from .exact_second_stage import exact_second_stage
+from .linalg import risk_roots
+from .local_search import local_search
 
-def miqp(data: AssetData, gamma: float, budget: float) -> NDArray[np.float64]:
-    n_assets = len(data.names)
 
+def _build_miqp(n_assets: int, cutoff: bool = False, factors: int | None = None) -> CachedProblem:
     shares = cp.Variable(n_assets, integer=True)
-    scale = data.prices / budget
-    weights = cp.multiply(shares, scale)
+    risk = cp.Variable(factors or n_assets)
+
+    # Data is pre-scaled by prices / budget so every term stays linear in the parameters, and
+    # the objective by c = 1 / max|μ * prices / budget| so the solver sees O(1) coefficients
+    share_returns = cp.Parameter(n_assets)  # c μ * prices / budget
+    share_risk_root = cp.Parameter(risk.shape + (n_assets,))  # √(cγ) R diag(prices / budget)
+    share_weights = cp.Parameter(n_assets, nonneg=True)  # prices / budget
+
+    parameters = {
+        "share_returns": share_returns,
+        "share_risk_root": share_risk_root,
+        "share_weights": share_weights,
+    }
+
+    portfolio_return = share_returns @ shares
+    penalized_variance = cp.sum_squares(risk)  # cγ w'Σw
 
-    portfolio_return = cp.sum(cp.multiply(data.expected_returns, weights))
-    portfolio_variance = cp.quad_form(weights, data.covariance_matrix)
+    # Factor model: k-dimensional risk plus a diagonal idiosyncratic term
+    if factors is not None:
+        share_idiosyncratic_root = cp.Parameter(n_assets, nonneg=True)  # √(cγD) prices / budget
+        penalized_variance += cp.sum_squares(cp.multiply(share_idiosyncratic_root, shares))
+        parameters["share_idiosyncratic_root"] = share_idiosyncratic_root
 
-    objective = cp.Maximize(portfolio_return - gamma * portfolio_variance)
+    utility = portfolio_return - penalized_variance
+
+    objective = cp.Maximize(utility)
 
     constraints = [
-        cp.sum(cp.multiply(shares, data.prices)) <= budget,
+        risk == share_risk_root @ shares,
+        share_weights @ shares <= 1,  # sum(shares * prices) <= budget
     ]
 
+    # Prune every branch that cannot beat the warm-start portfolio (scaled by c)
+    if cutoff:
+        incumbent_utility = cp.Parameter()
+        constraints.append(utility >= incumbent_utility)
+        parameters["incumbent_utility"] = incumbent_utility
+
     problem = cp.Problem(objective, constraints)
 
-    problem.solve(solver=cp.SCIP)
+    return CachedProblem(problem, {"shares": shares, "risk": risk}, parameters)
+
+
+def _utility(data: AssetData, gamma: float, budget: float, shares: NDArray[np.float64]) -> float:
+    weights = shares * data.prices / budget
+    return float(
+        weights @ data.expected_returns - gamma * weights @ data.covariance_matrix @ weights
+    )
+
+
+def _best_shares(
+    data: AssetData,
+    gamma: float,
+    budget: float,
+    shares: NDArray[np.float64],
+    initial_shares: NDArray[np.float64] | None,
+) -> NDArray[np.float64]:
+    # A solver stopped by a limit may return a worse incumbent than the start
+    if initial_shares is not None and _utility(data, gamma, budget, initial_shares) > _utility(
+        data, gamma, budget, shares
+    ):
+        return initial_shares
+
+    return shares
+
+
+def heuristic_miqp(
+    data: AssetData,
+    gamma: float,
+    budget: float,
+    initial_shares: NDArray[np.float64] | None = None,
+) -> NDArray[np.float64]:
+    # Round the continuous optimum to whole shares within budget, then polish with local search
+    optimal_values = analytic_qp(data, gamma) * budget
+    shares = exact_second_stage(optimal_values, data.prices, budget)
+    shares = _best_shares(data, gamma, budget, shares, initial_shares)
+    shares = local_search(data, shares, gamma, budget)
+
+    return shares * data.prices / budget
+
+
+def _solve_miqp(
+    data: AssetData,
+    gamma: float,
+    budget: float,
+    solver: str | list[str] | None,
+    options: SolverOptions | None,
+    initial_shares: NDArray[np.float64] | None = None,
+) -> tuple[CachedProblem | None, str, float]:
+    """Solve the scaled MIQP; also returns the objective scale c (solver objective = c · utility)."""
+    n_assets = len(data.names)
+    scale = data.prices / budget
+
+    # Tiny objective coefficients make SCIP stop early with a suboptimal "optimal" incumbent
+    share_returns = data.expected_returns * scale
+    objective_scale = 1 / max(float(np.max(np.abs(share_returns))), 1e-300)
+
+    risk_root, idiosyncratic_root = risk_roots(data.factor)
+    root_scale = np.sqrt(objective_scale * gamma) * scale
 
-    optimal_weights = shares.value * data.prices / budget
+    values = {
+        "share_returns": share_returns * objective_scale,
+        "share_risk_root": risk_root * root_scale,
+        "share_weights": scale,
+    }
+
+    factors = None
+    if idiosyncratic_root is not None:
+        factors = len(risk_root)
+        values["share_idiosyncratic_root"] = idiosyncratic_root * root_scale
+
+    cutoff = initial_shares is not None
+    initial = None
+
+    # Warm start: MIP start plus an objective cutoff slightly below the start's utility
+    if initial_shares is not None:
+        utility = _utility(data, gamma, budget, initial_shares) * objective_scale
+        values["incumbent_utility"] = utility - 1e-6 * max(abs(utility), 1.0)
+        initial = {"shares": initial_shares, "risk": values["share_risk_root"] @ initial_shares}
+
+    cached, backend = solve_with_fallback(
+        f"miqp(cutoff={cutoff}, factors={factors})",
+        n_assets,
+        partial(_build_miqp, cutoff=cutoff, factors=factors),
+        values,
+        solver,
+        options,
+        initial=initial,
+    )
+    return cached, backend, objective_scale
+
+
+def miqp(
+    data: AssetData,
+    gamma: float,
+    budget: float,
+    solver: str | list[str] | None = None,
+    options: SolverOptions | None = None,
+    initial_shares: NDArray[np.float64] | None = None,
+) -> NDArray[np.float64]:
+    """
+    Solve the integer mean-variance problem over whole shares within budget.
+
+    A feasible initial_shares is used as an objective cutoff (and as the MIP start on
+    Gurobi); the result is never worse than it.
+    """
+    initial_shares = feasible_start(data.prices, budget, initial_shares)
+    cached, backend, _ = _solve_miqp(data, gamma, budget, solver, options, initial_shares)
+
+    # Built-in backend
+    if cached is None:
+        return heuristic_miqp(data, gamma, budget, initial_shares)
+
+    shares = _best_shares(data, gamma, budget, cached.solution("shares", backend), initial_shares)
+
+    optimal_weights = shares * data.prices / budget
 
     return optimal_weights
+
+
+def anytime_miqp(
+    data: AssetData,
+    gamma: float,
+    budget: float,
+    time_limit: float | None = None,
+    node_limit: int | None = None,
+    solver: str | list[str] | None = None,
+    options: SolverOptions | None = None,
+    record_trace: bool = False,
+    initial_shares: NDArray[np.float64] | None = None,
+) -> MIQPResult:
+    """
+    Solve the MIQP within a wall-clock and/or node budget and report the best incumbent,
+    the proven bound and the final gap.
+
+    With record_trace, the incumbents a solver kept are returned with the time they were
+    found (SCIP); other backends only report the final incumbent. A feasible initial_shares
+    seeds the search as in miqp.
+    """
+    # The limit arguments override the matching options only when given
+    options = options or SolverOptions()
+    if time_limit is not None:
+        options = replace(options, time_limit=time_limit)
+    if node_limit is not None:
+        options = replace(options, node_limit=node_limit)
+    initial_shares = feasible_start(data.prices, budget, initial_shares)
+
+    start = time.perf_counter()
+    cached, backend, objective_scale = _solve_miqp(
+        data, gamma, budget, solver, options, initial_shares
+    )
+
+    if cached is None:
+        weights = heuristic_miqp(data, gamma, budget, initial_shares)
+        shares = np.round(weights * budget / data.prices)
+        status = "heuristic"
+    else:
+        shares = _best_shares(
+            data, gamma, budget, np.round(cached.solution("shares", backend)), initial_shares
+        )
+        status = cached.problem.status
+
+    solve_time = time.perf_counter() - start
+
+    weights = shares * data.prices / budget
+    objective = _utility(data, gamma, budget, shares)
+
+    # The unconstrained continuous optimum μ'Σ⁻¹μ / 4γ bounds every integer portfolio
+    bound = float(data.precision_returns @ data.expected_returns / (4 * gamma))
+    nodes = None
+    trace = [(solve_time, objective)] if record_trace else []
+
+    # Solver telemetry (solvers minimize the negated objective)
+    stats: Any = cached.problem.solver_stats.extra_stats if cached is not None else None
+    if stats is not None:
+        match backend:
+            case "SCIP":
+                model = stats["model"]
+                bound = min(bound, -model.getDualbound() / objective_scale)
+                nodes = model.getNNodes()
+                if record_trace:
+                    found = sorted(
+                        (
+                            model.getSolTime(solution),
+                            -model.getSolObjVal(solution) / objective_scale,
+                        )
+                        for solution in model.getSols()
+                    )
+                    trace = []
+                    for seconds, value in found:
+                        if not trace or value > trace[-1][1]:
+                            trace.append((seconds, value))
+
+            case "GUROBI":
+                bound = min(bound, -stats.ObjBound / objective_scale)
+                nodes = int(stats.NodeCount)
+
+    gap = (bound - objective) / max(abs(objective), 1e-12)
+
+    return MIQPResult(
+        weights=weights,
+        shares=shares,
+        objective=objective,
+        bound=bound,
+        gap=max(gap, 0.0),
+        backend=backend,
+        status=status,
+        solve_time=solve_time,
+        nodes=nodes,
+        trace=trace,
+    )
@@ -1,25 +1,74 @@
+from functools import partial
+
 import cvxpy as cp
 import numpy as np
 from numpy.typing import NDArray
 
 from research.interfaces import AssetData
 
+from .cache import CachedProblem, problem_cache
+from .linalg import risk_roots
 
-def qp(data: AssetData, gamma: float, scale_weights: bool = False) -> NDArray[np.float64]:
-
-    n_assets = len(data.names)
 
+def _build_qp(n_assets: int, factors: int | None = None) -> CachedProblem:
     weights = cp.Variable(n_assets)
 
-    portfolio_return = weights.T @ data.expected_returns
-    portfolio_variance = weights.T @ data.covariance_matrix @ weights
+    expected_returns = cp.Parameter(n_assets)
+    risk_root = cp.Parameter((factors or n_assets, n_assets))  # sqrt(γ) R, Σ = R'R (+ D)
+
+    portfolio_return = expected_returns @ weights
+    penalized_variance = cp.sum_squares(risk_root @ weights)  # γ w'Σw
 
-    objective = cp.Maximize(portfolio_return - gamma * portfolio_variance)
+    parameters = {"expected_returns": expected_returns, "risk_root": risk_root}
+
+    # Factor model: k-dimensional risk plus a diagonal idiosyncratic term
+    if factors is not None:
+        idiosyncratic_root = cp.Parameter(n_assets, nonneg=True)  # sqrt(γD)
+        penalized_variance += cp.sum_squares(cp.multiply(idiosyncratic_root, weights))
+        parameters["idiosyncratic_root"] = idiosyncratic_root
+
+    objective = cp.Maximize(portfolio_return - penalized_variance)
 
     problem = cp.Problem(objective)
-    problem.solve()
 
-    total_value = np.sum(weights.value)
-    optimal_weights = weights.value / total_value if scale_weights else weights.value
+    return CachedProblem(problem, {"weights": weights}, parameters)
+
+
+def qp(
+    data: AssetData,
+    gamma: float,
+    scale_weights: bool = False,
+    solver: str | None = None,
+) -> NDArray[np.float64]:
+
+    n_assets = len(data.names)
+    risk_root, idiosyncratic_root = risk_roots(data.factor)
+
+    values = {
+        "expected_returns": data.expected_returns,
+        "risk_root": np.sqrt(gamma) * risk_root,
+    }
+    if idiosyncratic_root is None:
+        cached = problem_cache.get("qp", n_assets, solver, _build_qp)
+    else:
+        factors = len(risk_root)
+        values["idiosyncratic_root"] = np.sqrt(gamma) * idiosyncratic_root
+        cached = problem_cache.get(
+            f"qp(factors={factors})",
+            n_assets,
+            solver,
+            partial(_build_qp, factors=factors),
+        )
+
+    cached.solve(values, solver=solver)
+
+    # E.g. unbounded when a singular Σ has a riskless direction with positive return
+    if cached.problem.status not in cp.settings.SOLUTION_PRESENT:
+        raise cp.SolverError(f"QP finished with status {cached.problem.status}")
+
+    weights = cached.solution("weights", solver)
+
+    total_value = np.sum(weights)
+    optimal_weights = weights / total_value if scale_weights else weights
 
     return optimal_weights
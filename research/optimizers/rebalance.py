@@ -0,0 +1,366 @@
+from functools import partial
+
+import cvxpy as cp
+import numpy as np
+from numpy.typing import NDArray
+
+from research.covariance import FactorCovariance, covariance_block
+from research.interfaces import AssetData
+
+from .backends import SolverOptions, solve_with_fallback
+from .cache import CachedProblem
+from .linalg import risk_roots
+
+
+def _build_rebalance(
+    n_assets: int, capped: bool = False, factors: int | None = None
+) -> CachedProblem:
+    # Integer trades of the assets left after pruning; pruned assets keep their holdings
+    buys = cp.Variable(n_assets, integer=True)
+    sells = cp.Variable(n_assets, integer=True)
+    trades = buys - sells
+    risk = cp.Variable(factors or n_assets)
+
+    # Same scaling as the MIQP: per-share weights prices / budget, objective scaled by c
+    share_returns = cp.Parameter(n_assets)  # c μ * prices / budget
+    share_risk_root = cp.Parameter(risk.shape + (n_assets,))  # √(cγ) R diag(prices / budget)
+    held_risk = cp.Parameter(risk.shape)  # Risk root times all current holdings
+    share_weights = cp.Parameter(n_assets, nonneg=True)  # prices / budget
+    share_costs = cp.Parameter(n_assets, nonneg=True)  # c cost rate * prices / budget
+    budget_left = cp.Parameter()  # 1 - weight of the current holdings
+    no_buys = cp.Parameter(n_assets, nonneg=True)  # 1 where buying is pruned
+    no_sells = cp.Parameter(n_assets, nonneg=True)  # 1 where selling is pruned
+    incumbent_utility = cp.Parameter()  # Utility of keeping the current holdings
+
+    parameters = {
+        "share_returns": share_returns,
+        "share_risk_root": share_risk_root,
+        "held_risk": held_risk,
+        "share_weights": share_weights,
+        "share_costs": share_costs,
+        "budget_left": budget_left,
+        "no_buys": no_buys,
+        "no_sells": no_sells,
+        "incumbent_utility": incumbent_utility,
+    }
+
+    penalized_variance = cp.sum_squares(risk)
+
+    # Factor model: k-dimensional risk plus a diagonal idiosyncratic term
+    if factors is not None:
+        held = cp.Parameter(n_assets)  # Current shares of these assets
+        share_idiosyncratic_root = cp.Parameter(n_assets, nonneg=True)  # √(cγD) prices / budget
+        penalized_variance += cp.sum_squares(
+            cp.multiply(share_idiosyncratic_root, held)
+            + cp.multiply(share_idiosyncratic_root, trades)
+        )
+        parameters["held"] = held
+        parameters["share_idiosyncratic_root"] = share_idiosyncratic_root
+
+    # Utility of the trades, up to the constant return of the current holdings
+    utility = share_returns @ trades - penalized_variance - share_costs @ (buys + sells)
+
+    constraints = [
+        buys >= 0,
+        sells >= 0,
+        risk == held_risk + share_risk_root @ trades,
+        share_weights @ trades <= budget_left,  # sum(shares * prices) <= budget
+        cp.multiply(no_buys, buys) == 0,
+        cp.multiply(no_sells, sells) == 0,
+        utility >= incumbent_utility,
+    ]
+
+    if capped:
+        max_turnover = cp.Parameter(nonneg=True)  # Traded value / budget
+        constraints.append(share_weights @ (buys + sells) <= max_turnover)
+        parameters["max_turnover"] = max_turnover
+
+    problem = cp.Problem(cp.Maximize(utility), constraints)
+
+    return CachedProblem(problem, {"buys": buys, "sells": sells, "risk": risk}, parameters)
+
+
+def _trade_bounds(
+    data: AssetData,
+    gamma: float,
+    weights: NDArray[np.float64],
+    covariance: NDArray[np.float64] | FactorCovariance,
+    max_turnover: float | None,
+) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Bounds on the marginal utility g = μ - 2γΣw over every portfolio that can beat the current
+    one: within the turnover cap |Σ(w - w₀)|ᵢ ≤ τ √Σᵢᵢ max √Σⱼⱼ, and (Σ positive definite)
+    inside the ellipsoid μ'w - γw'Σw ≥ U(w₀), where |Σw - μ/2γ|ᵢ ≤ √(ρ Σᵢᵢ).
+    """
+    variances = data.variances
+    center = covariance @ weights
+    radius = np.full(len(weights), np.inf)
+
+    if max_turnover is not None:
+        radius = max_turnover * np.sqrt(variances) * np.sqrt(variances.max())
+
+    # A semidefinite Σ leaves the ellipsoid unbounded along its null space
+    if isinstance(data.factor, FactorCovariance) or data.factor.kind == "cholesky":
+        held_utility = weights @ data.expected_returns - gamma * weights @ center
+        best_utility = data.expected_returns @ data.precision_returns / (4 * gamma)
+        rho = max(float(best_utility - held_utility), 0.0) / gamma
+        ellipsoid_radius = np.sqrt(rho * variances)
+        ellipsoid_center = data.expected_returns / (2 * gamma)
+
+        # Intersect the two intervals
+        low = np.maximum(center - radius, ellipsoid_center - ellipsoid_radius)
+        high = np.minimum(center + radius, ellipsoid_center + ellipsoid_radius)
+    else:
+        low, high = center - radius, center + radius
+
+    return data.expected_returns - 2 * gamma * high, data.expected_returns - 2 * gamma * low
+
+
+def prune_trades(
+    data: AssetData,
+    gamma: float,
+    budget: float,
+    current_shares: NDArray[np.float64],
+    costs: NDArray[np.float64],
+    max_turnover: float | None = None,
+) -> tuple[NDArray[np.bool_], NDArray[np.bool_]]:
+    """
+    Assets no optimal rebalance buys, and assets no optimal rebalance sells.
+
+    With g bounded over the portfolios that can beat the current one (_trade_bounds), an
+    optimum that buys asset i could drop one share bought (cheaper, less turnover) and gain
+    s(κ - g) - γs²Σᵢᵢ, s = pᵢ / budget, so no optimum buys i when that is positive for every g.
+    Dropping one share sold needs cash: unless the optimum buys nothing, it is combined with
+    dropping shares bought (one share of a pricier asset, or any shares worth at least pᵢ,
+    bounded with the triangle inequality on the risk), and a sale is pruned when every such
+    combination is strictly improving.
+    """
+    covariance = data.covariance_matrix
+    assets = np.arange(len(data.prices))
+    scale = data.prices / budget
+    weights = current_shares * scale
+    variances = data.variances
+    share_costs = costs * scale
+
+    lowest, highest = _trade_bounds(data, gamma, weights, covariance, max_turnover)
+    curvature = gamma * scale**2 * variances
+    tolerance = 1e-12
+
+    # Undoing one share bought (g ≤ high)
+    buy_gain = share_costs - scale * highest - curvature
+    no_buys = buy_gain > tolerance
+
+    # Undoing one share sold (g ≥ lowest) needs its price in cash. If the optimum buys
+    # nothing it is feasible alone; otherwise shares bought are undone with it until enough
+    # cash is freed (an optimum never both buys and sells one asset, up to netting)
+    sell_gain = scale * lowest + share_costs - curvature
+    no_sells = sell_gain > tolerance
+
+    buyable = ~no_buys
+    if buyable.any():
+        # One share bought of a pricier asset j frees enough: exact pairwise change, over
+        # the assets that can still be bought only
+        buy_assets = np.flatnonzero(buyable)
+        pair_scale = 2 * gamma * np.outer(scale, scale[buy_assets])
+        pair_gain = (
+            sell_gain[:, None]
+            + buy_gain[None, buy_assets]
+            + pair_scale * covariance_block(covariance, assets, buy_assets)
+        )
+        pair_gain[data.prices[None, buy_assets] < data.prices[:, None]] = -np.inf
+        pair_gain[assets[:, None] == buy_assets[None, :]] = np.inf
+        paired = (pair_gain > tolerance).all(axis=1)
+
+        # Any shares bought, of total weight V < sᵢ + max sⱼ: the change is concave in V,
+        # so it is bounded below by its value at V = 0 (the sale alone) and V = max
+        per_weight = float(np.min(share_costs[buyable] / scale[buyable] - highest[buyable]))
+        undone = scale + scale[buyable].max()
+        mixed_gain = (
+            scale * (lowest + share_costs / scale)
+            + per_weight * undone
+            - gamma * (scale * np.sqrt(variances) + undone * np.sqrt(variances[buyable].max())) ** 2
+        )
+        no_sells &= paired | (mixed_gain > tolerance)
+
+    return no_buys, no_sells
+
+
+def _objective(
+    data: AssetData,
+    gamma: float,
+    budget: float,
+    shares: NDArray[np.float64],
+    current_shares: NDArray[np.float64],
+    costs: NDArray[np.float64],
+) -> float:
+    weights = shares * data.prices / budget
+    traded = np.abs(shares - current_shares) * data.prices / budget
+    return float(
+        weights @ data.expected_returns
+        - gamma * weights @ data.covariance_matrix @ weights
+        - costs @ traded
+    )
+
+
+def _greedy_rebalance(
+    data: AssetData,
+    gamma: float,
+    budget: float,
+    current_shares: NDArray[np.float64],
+    costs: NDArray[np.float64],
+    max_turnover: float | None,
+    no_buys: NDArray[np.bool_],
+    no_sells: NDArray[np.bool_],
+    max_iterations: int = 10_000,
+) -> NDArray[np.float64]:
+    # Built-in backend: best improving ±1 share trade until none improves, as in local_search
+    covariance = data.covariance_matrix
+    assets = np.arange(len(data.prices))
+    scale = data.prices / budget
+    shares = np.array(current_shares, dtype=np.float64)
+    covariance_weights = covariance @ (shares * scale)
+    cash = budget - shares @ data.prices
+    turnover_left = np.inf if max_turnover is None else max_turnover
+    variances = data.variances
+    share_costs = costs * scale
+
+    for _ in range(max_iterations):
+        trades = shares - current_shares
+        best_change, best_asset, best_direction = 1e-12, -1, 0.0
+
+        for direction, pruned in ((1.0, no_buys), (-1.0, no_sells)):
+            step = direction * scale
+
+            # Trading toward the current holdings refunds cost and turnover
+            unwinding = trades * direction < 0
+            cost = np.where(unwinding, -share_costs, share_costs)
+            turnover = np.where(unwinding, -scale, scale)
+
+            changes = (
+                step * data.expected_returns
+                - gamma * (2 * step * covariance_weights + step**2 * variances)
+                - cost
+            )
+            allowed = (turnover <= turnover_left) & (~pruned | unwinding)
+            if direction > 0:
+                allowed &= data.prices <= cash
+            changes = np.where(allowed, changes, -np.inf)
+
+            asset = int(np.argmax(changes))
+            if changes[asset] > best_change:
+                best_change, best_asset, best_direction = changes[asset], asset, direction
+
+        if best_asset < 0:
+            break
+
+        unwinding = trades[best_asset] * best_direction < 0
+        shares[best_asset] += best_direction
+        cash -= best_direction * data.prices[best_asset]
+        turnover_left -= -scale[best_asset] if unwinding else scale[best_asset]
+        column = covariance_block(covariance, assets, np.array([best_asset]))[:, 0]
+        covariance_weights += best_direction * scale[best_asset] * column
+
+    return shares
+
+
+def rebalance(
+    data: AssetData,
+    gamma: float,
+    budget: float,
+    current_shares: NDArray[np.float64],
+    costs: float | NDArray[np.float64] = 0.0,
+    max_turnover: float | None = None,
+    solver: str | list[str] | None = None,
+    options: SolverOptions | None = None,
+) -> NDArray[np.float64]:
+    """
+    Rebalance whole-share holdings: maximize μ'w - γw'Σw - Σ costs * |traded value| / budget
+    over integer buys and sells from `current_shares`, within budget and an optional turnover
+    cap (traded value / budget).
+
+    The current holdings are the incumbent (objective cutoff, MIP start on Gurobi), so the result is
+    never worse than not trading. Trades that provably cannot appear in an optimum are pruned
+    first (prune_trades) and assets with nothing left to trade are dropped from the model,
+    which for small rebalances leaves a much smaller integer problem. Costs are proportional
+    rates of traded value, one per asset or shared.
+    """
+    if budget is None or not budget > 0:
+        raise ValueError(f"Rebalance needs a positive budget, got {budget}")
+
+    current_shares = np.round(np.asarray(current_shares, dtype=np.float64))
+    costs = np.broadcast_to(np.asarray(costs, dtype=np.float64), current_shares.shape)
+    if current_shares @ data.prices > budget:
+        raise ValueError("Current holdings exceed the budget")
+
+    no_buys, no_sells = prune_trades(data, gamma, budget, current_shares, costs, max_turnover)
+    active = ~(no_buys & no_sells)
+    if not active.any():
+        return current_shares * data.prices / budget
+
+    scale = data.prices / budget
+    share_returns = data.expected_returns * scale
+    objective_scale = 1 / max(float(np.max(np.abs(share_returns))), 1e-300)
+
+    risk_root, idiosyncratic_root = risk_roots(data.factor)
+    root_scale = np.sqrt(objective_scale * gamma) * scale
+    share_risk_root = risk_root * root_scale
+
+    held_risk = share_risk_root @ current_shares
+    incumbent = -(held_risk @ held_risk)
+
+    values = {
+        "share_returns": (share_returns * objective_scale)[active],
+        "share_risk_root": share_risk_root[:, active],
+        "held_risk": held_risk,
+        "share_weights": scale[active],
+        "share_costs": (costs * scale * objective_scale)[active],
+        "budget_left": 1 - scale @ current_shares,
+        "no_buys": no_buys[active].astype(np.float64),
+        "no_sells": no_sells[active].astype(np.float64),
+    }
+
+    factors = None
+    if idiosyncratic_root is not None:
+        factors = len(risk_root)
+        share_idiosyncratic_root = (idiosyncratic_root * root_scale)[active]
+        held = current_shares[active]
+        values["held"] = held
+        values["share_idiosyncratic_root"] = share_idiosyncratic_root
+        incumbent -= np.sum((share_idiosyncratic_root * held) ** 2)
+
+    # Cutoff slightly below the incumbent so rounding cannot make it infeasible
+    values["incumbent_utility"] = incumbent - 1e-6 * max(abs(incumbent), 1.0)
+
+    capped = max_turnover is not None
+    if capped:
+        values["max_turnover"] = max_turnover
+
+    n_active = int(active.sum())
+    cached, _ = solve_with_fallback(
+        f"rebalance(capped={capped}, factors={factors})",
+        n_active,
+        partial(_build_rebalance, capped=capped, factors=factors),
+        values,
+        solver,
+        options,
+        initial={"buys": np.zeros(n_active), "sells": np.zeros(n_active), "risk": held_risk},
+    )
+
+    # Built-in backend
+    if cached is None:
+        shares = _greedy_rebalance(
+            data, gamma, budget, current_shares, costs, max_turnover, no_buys, no_sells
+        )
+    else:
+        shares = current_shares.copy()
+        buys, sells = cached.variables["buys"].value, cached.variables["sells"].value
+        shares[active] += np.round(np.asarray(buys) - np.asarray(sells))
+
+    # A solver stopped by a limit may return a worse incumbent than not trading
+    if _objective(data, gamma, budget, shares, current_shares, costs) < _objective(
+        data, gamma, budget, current_shares, current_shares, costs
+    ):
+        shares = current_shares
+
+    optimal_weights: NDArray[np.float64] = shares * data.prices / budget
+    return optimal_weights
@@ -0,0 +1,90 @@
+from functools import partial
+
+import cvxpy as cp
+import numpy as np
+from numpy.typing import NDArray
+
+from .backends import SolverOptions, feasible_start, solve_with_fallback
+from .cache import CachedProblem
+from .exact_second_stage import exact_second_stage
+
+
+def _build_second_stage(n_assets: int, cutoff: bool = False) -> CachedProblem:
+    shares = cp.Variable(n_assets, integer=True)
+
+    optimal_values = cp.Parameter(n_assets)
+    prices = cp.Parameter(n_assets, nonneg=True)
+    budget = cp.Parameter(nonneg=True)
+
+    values = cp.multiply(shares, prices)
+    error = cp.sum_squares(optimal_values - values)
+
+    objective = cp.Minimize(error)
+
+    constraints = [
+        prices @ shares <= budget,
+    ]
+
+    parameters = {"optimal_values": optimal_values, "prices": prices, "budget": budget}
+
+    # Prune every branch that cannot beat the warm-start allocation
+    if cutoff:
+        incumbent_error = cp.Parameter(nonneg=True)
+        constraints.append(error <= incumbent_error)
+        parameters["incumbent_error"] = incumbent_error
+
+    problem = cp.Problem(objective, constraints)
+
+    return CachedProblem(problem, {"shares": shares}, parameters)
+
+
+def second_stage(
+    optimal_values: NDArray[np.float64],
+    prices: NDArray[np.float64],
+    budget: float,
+    solver: str | list[str] | None = None,
+    options: SolverOptions | None = None,
+    initial_shares: NDArray[np.float64] | None = None,
+) -> NDArray[np.float64]:
+    """
+    Find the whole-share allocation closest to the optimal dollar values within budget.
+
+    A feasible initial_shares is used as an objective cutoff (and as the MIP start on Gurobi);
+    the result is never worse than it.
+    """
+
+    def error(shares: NDArray[np.float64]) -> float:
+        return float(np.sum((optimal_values - shares * prices) ** 2))
+
+    initial_shares = feasible_start(prices, budget, initial_shares)
+
+    values = {"optimal_values": optimal_values, "prices": prices, "budget": budget}
+    optimizer, build = "second_stage", _build_second_stage
+
+    if initial_shares is not None:
+        incumbent_error = error(initial_shares)
+        values["incumbent_error"] = incumbent_error * (1 + 1e-6) + 1e-6
+        optimizer, build = "second_stage(cutoff=True)", partial(_build_second_stage, cutoff=True)
+
+    cached, backend = solve_with_fallback(
+        optimizer,
+        len(prices),
+        build,
+        values,
+        solver,
+        options,
+        initial=None if initial_shares is None else {"shares": initial_shares},
+    )
+
+    # Built-in backend
+    if cached is None:
+        node_limit = None if options is None else options.node_limit
+        return exact_second_stage(optimal_values, prices, budget, node_limit, initial_shares)
+
+    shares = cached.solution("shares", backend)
+
+    # A solver stopped by a limit may return a worse incumbent than the start
+    if initial_shares is not None and error(shares) > incumbent_error:
+        return initial_shares
+
+    return shares
@@ -5,20 +5,50 @@ from scipy.optimize import minimize
 from research.interfaces import AssetData
 
 
-def slsqp(data: AssetData, weights: np.ndarray) -> NDArray[np.float64]:
+def slsqp(
+    data: AssetData,
+    weights: np.ndarray,
+    analytic_gradient: bool = True,
+    tol: float | None = None,
+    maxiter: int = 100,
+) -> NDArray[np.float64]:
 
-    constraints = {"type": "eq", "fun": lambda x: np.sum(x) - 1}
+    constraints = {
+        "type": "eq",
+        "fun": lambda x: np.sum(x) - 1,
+        "jac": lambda x: np.ones_like(x),
+    }
 
     def negative_sharpe_ratio(weights: NDArray[np.float64]) -> float:
-        portfolio_return: float = weights.T @ data.expected_returns
-        portfolio_volatility: float = np.sqrt(weights.T @ data.covariance_matrix @ weights)
+        portfolio_return = float(weights.T @ data.expected_returns)
+        portfolio_volatility = float(np.sqrt(weights.T @ data.covariance_matrix @ weights))
         return -(portfolio_return / portfolio_volatility)
 
+    def negative_sharpe_ratio_and_gradient(
+        weights: NDArray[np.float64],
+    ) -> tuple[float, NDArray[np.float64]]:
+        # Σw is shared between the value and the gradient
+        covariance_weights = data.covariance_matrix @ weights
+        portfolio_return = float(weights @ data.expected_returns)
+        portfolio_volatility = float(np.sqrt(weights @ covariance_weights))
+
+        sharpe = portfolio_return / portfolio_volatility
+        gradient = (
+            data.expected_returns - sharpe * covariance_weights / portfolio_volatility
+        ) / portfolio_volatility
+
+        return -sharpe, -gradient
+
     result = minimize(
-        fun=negative_sharpe_ratio,
+        fun=negative_sharpe_ratio_and_gradient if analytic_gradient else negative_sharpe_ratio,
         x0=weights,
         method="SLSQP",
+        jac=analytic_gradient,
         constraints=constraints,
+        tol=tol,
+        options={"maxiter": maxiter},
     )
 
-    return result.x
+    optimal_weights: NDArray[np.float64] = result.x
+
+    return optimal_weights
@@ -0,0 +1,62 @@
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from research.enums import Optimizer
+from research.interfaces import AssetData
+
+from .engine import optimize
+
+# Optimizers that accept initial_shares: a MIP start on backends that take one and an
+# incumbent the result never falls below. REBALANCE starts from its current_shares instead.
+WARM_STARTED = (
+    Optimizer.MIQP,
+    Optimizer.TWO_STAGE_QP,
+    Optimizer.TWO_STAGE_SLSQP,
+)
+
+
+def optimize_sweep(
+    optimizer: Optimizer,
+    data: AssetData | Iterable[AssetData],
+    points: Iterable[dict[str, Any]],
+    weights: NDArray[np.float64] | None = None,
+    **kwargs: Any,
+) -> list[NDArray[np.float64]]:
+    """
+    Solve a sequence of neighbouring problems (budgets, gammas, samples), feeding each integer
+    solution forward as the initial_shares of the next point.
+
+    `points` holds the per-point kwargs (e.g. {"budget": 1e4}); `kwargs` are shared by every
+    point. `data` is one AssetData for all points or one per point. The previous weights are
+    converted to whole shares at the next point's budget and prices, i.e. rescaled by the
+    budget ratio and rounded down so the start stays within budget.
+    """
+    points = list(points)
+    samples = [data] * len(points) if isinstance(data, AssetData) else list(data)
+    if len(samples) != len(points):
+        raise ValueError("Expected one AssetData per sweep point")
+
+    results = []
+    previous: NDArray[np.float64] | None = None
+
+    for sample, point in zip(samples, points):
+        point_kwargs = {**kwargs, **point}
+        n_assets = len(sample.names)
+        initial_weights = weights if weights is not None else np.ones(n_assets) / n_assets
+
+        if optimizer in WARM_STARTED:
+            budget: float | None = point_kwargs.get("budget", None)
+            if budget is None:
+                raise ValueError(f"The {optimizer.value} optimizer needs a budget at every point")
+
+            if previous is not None and len(previous) == n_assets:
+                initial_shares = np.floor(previous * budget / sample.prices)
+                point_kwargs.setdefault("initial_shares", initial_shares)
+
+        previous = optimize(optimizer, sample, initial_weights, **point_kwargs)
+        results.append(previous)
+
+    return results
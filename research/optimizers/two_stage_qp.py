@@ -1,32 +1,27 @@
-import cvxpy as cp
 import numpy as np
 from numpy.typing import NDArray
 
 from research.interfaces import AssetData
 
-from .qp import qp
+from .analytic_qp import analytic_qp
+from .backends import SolverOptions
+from .second_stage import second_stage
 
 
 def two_stage_qp(
-    data: AssetData, gamma: float, budget: float, scale_weights: bool = True
+    data: AssetData,
+    gamma: float,
+    budget: float,
+    scale_weights: bool = True,
+    solver: str | list[str] | None = None,
+    options: SolverOptions | None = None,
+    initial_shares: NDArray[np.float64] | None = None,
 ) -> NDArray[np.float64]:
-    optimal_weights = qp(data, gamma, scale_weights=scale_weights)
+    optimal_weights = analytic_qp(data, gamma, scale_weights=scale_weights)
     optimal_values = optimal_weights * budget
-    n_assets = len(data.names)
 
-    shares = cp.Variable(n_assets, integer=True)
-    values = cp.multiply(shares, data.prices)
+    shares = second_stage(optimal_values, data.prices, budget, solver, options, initial_shares)
 
-    objective = cp.Minimize(cp.sum_squares(optimal_values - values))
-
-    constraints = [
-        cp.sum(cp.multiply(shares, data.prices)) <= budget,
-    ]
-
-    problem = cp.Problem(objective, constraints)
-
-    problem.solve(solver=cp.GUROBI)
-
-    approximate_weights = shares.value * data.prices / budget
+    approximate_weights = shares * data.prices / budget
 
     return approximate_weights
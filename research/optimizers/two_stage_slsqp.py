@@ -1,33 +1,28 @@
-import cvxpy as cp
 import numpy as np
 from numpy.typing import NDArray
 
 from research.interfaces import AssetData
 
+from .backends import SolverOptions
+from .second_stage import second_stage
 from .slsqp import slsqp
 
 
 def two_stage_slsqp(
-    data: AssetData, initial_weights: NDArray[np.float64], budget: float
+    data: AssetData,
+    initial_weights: NDArray[np.float64],
+    budget: float,
+    solver: str | list[str] | None = None,
+    options: SolverOptions | None = None,
+    tol: float | None = None,
+    maxiter: int = 100,
+    initial_shares: NDArray[np.float64] | None = None,
 ) -> NDArray[np.float64]:
-    optimal_weights = slsqp(data, initial_weights)
+    optimal_weights = slsqp(data, initial_weights, tol=tol, maxiter=maxiter)
     optimal_values = optimal_weights * budget
 
-    n_assets = len(data.names)
+    shares = second_stage(optimal_values, data.prices, budget, solver, options, initial_shares)
 
-    shares = cp.Variable(n_assets, integer=True)
-    values = cp.multiply(shares, data.prices)
-
-    objective = cp.Minimize(cp.sum_squares(optimal_values - values))
-
-    constraints = [
-        cp.sum(cp.multiply(shares, data.prices)) <= budget,
-    ]
-
-    problem = cp.Problem(objective, constraints)
-
-    problem.solve(solver=cp.GUROBI)
-
-    approximate_weights = shares.value * data.prices / budget
+    approximate_weights = shares * data.prices / budget
 
     return approximate_weights
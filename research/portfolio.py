@@ -1,9 +1,13 @@
+from typing import Callable
+
 import numpy as np
 import pandas as pd
 from numpy.typing import NDArray
 
+from research.covariance import quadratic_forms
 from research.enums import Rounding
 from research.interfaces import AssetData
+from research.optimizers.local_search import local_search
 
 
 class Portfolio:
@@ -41,9 +45,27 @@ class Portfolio:
 
         return self.weights
 
-    def metrics_df(
-        self, include_weights: bool = False, include_shares: bool = False
-    ) -> pd.DataFrame:
+    def polish(
+        self, gamma: float = 2, invest_cash: bool = False, max_iterations: int = 10_000
+    ) -> NDArray[np.float64]:
+        # Local search from the whole-share portfolio (fractional shares are floored first)
+        self.shares = local_search(
+            self.data,
+            np.floor(self.shares),
+            gamma,
+            self.budget,
+            max_iterations=max_iterations,
+            invest_cash=invest_cash,
+        )
+
+        # Update allocations, value, and weights
+        self.allocations = self.shares * self.data.prices
+        self.value = self.allocations.sum()
+        self.weights = self.allocations / self.value
+
+        return self.weights
+
+    def metrics(self) -> dict[str, float]:
         # Metrics
         expected_return = (self.weights.T @ self.data.expected_returns) * self.annualize
         standard_deviation = np.sqrt(
@@ -51,11 +73,127 @@ class Portfolio:
         ) * np.sqrt(self.annualize)
         sharpe = expected_return / standard_deviation
 
+        return {
+            "expected_return": expected_return * 100,
+            "standard_deviation": standard_deviation * 100,
+            "sharpe": sharpe,
+            "value": self.value,
+            "deficit": self.value - self.budget,
+        }
+
+    def metrics_df(
+        self, include_weights: bool = False, include_shares: bool = False
+    ) -> pd.DataFrame:
         # Metrics Dataframe
         weights_dict = {f"{name}_W": weight for name, weight in zip(self.data.names, self.weights)}
         shares_dict = {f"{name}_S": share for name, share in zip(self.data.names, self.shares)}
 
-        metrics_dict = {
+        combined_dict = self.metrics()
+        if include_weights:
+            combined_dict.update(weights_dict)
+        if include_shares:
+            combined_dict.update(shares_dict)
+
+        return pd.DataFrame(combined_dict, index=[0])
+
+
+class PortfolioBatch:
+    """
+    K portfolios over the same assets, stored as a (K, n) weight array so rounding and metrics
+    are computed for all of them at once.
+    """
+
+    def __init__(
+        self,
+        data: AssetData,
+        weights: NDArray[np.float64],
+        budget: float | NDArray[np.float64],
+        annualize: int = 1,
+    ):
+        self.data = data
+        self.weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        self.budget = np.broadcast_to(np.asarray(budget, dtype=np.float64), len(self.weights))
+        self.annualize = annualize
+
+        self._update_allocations()
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def __getitem__(self, index: int) -> Portfolio:
+        portfolio = Portfolio(
+            self.data, self.weights[index], float(self.budget[index]), self.annualize
+        )
+
+        # Carry the row's shares over: rounded weights are normalized by value, not budget
+        portfolio.shares = self.shares[index].copy()
+        portfolio.allocations = self.allocations[index].copy()
+        portfolio.value = self.value[index]
+        portfolio.weights = self.weights[index].copy()
+
+        return portfolio
+
+    def _update_allocations(self) -> None:
+        # Allocations, shares, and value, one row per portfolio
+        self.allocations: NDArray[np.float64] = self.weights * self.budget[:, None]
+        self.shares: NDArray[np.float64] = self.allocations / self.data.prices
+        self.value: NDArray[np.float64] = self.shares @ self.data.prices
+
+    def _update_weights(self) -> None:
+        self.allocations = self.shares * self.data.prices
+        self.value = self.allocations.sum(axis=1)
+        self.weights = self.allocations / self.value[:, None]
+
+    def round(self, rounding: Rounding | None) -> NDArray[np.float64]:
+        # Rounding
+        match rounding:
+            case Rounding.CEIL:
+                self.shares = np.ceil(self.shares)
+
+            case Rounding.FLOOR:
+                self.shares = np.floor(self.shares)
+
+            case Rounding.MID:
+                self.shares = np.round(self.shares)
+
+        # Update allocations, value, and weights
+        self._update_weights()
+
+        return self.weights
+
+    def rounded(self, roundings: list[Rounding] | None = None) -> "PortfolioBatch":
+        """
+        Return a new batch with every portfolio rounded by every mode (all modes by default).
+
+        Rows are ordered by rounding, then portfolio: row r * K + k is portfolio k under
+        roundings[r].
+        """
+        roundings = list(Rounding) if roundings is None else roundings
+        rounders: dict[Rounding, Callable[[NDArray[np.float64]], NDArray[np.float64]]] = {
+            Rounding.CEIL: np.ceil,
+            Rounding.FLOOR: np.floor,
+            Rounding.MID: np.round,
+        }
+
+        batch = PortfolioBatch(
+            self.data,
+            np.tile(self.weights, (len(roundings), 1)),
+            np.tile(self.budget, len(roundings)),
+            self.annualize,
+        )
+        batch.shares = np.concatenate([rounders[rounding](self.shares) for rounding in roundings])
+        batch._update_weights()
+
+        return batch
+
+    def metrics(self) -> dict[str, NDArray[np.float64]]:
+        # Metrics for all K portfolios, variances from a single contraction with Σ
+        expected_return = (self.weights @ self.data.expected_returns) * self.annualize
+        variance = quadratic_forms(self.data.covariance_matrix, self.weights)
+        standard_deviation = np.sqrt(variance) * np.sqrt(self.annualize)
+        sharpe = expected_return / standard_deviation
+
+        return {
             "expected_return": expected_return * 100,
             "standard_deviation": standard_deviation * 100,
             "sharpe": sharpe,
@@ -63,10 +201,14 @@ class Portfolio:
             "deficit": self.value - self.budget,
         }
 
-        combined_dict = metrics_dict.copy()
+    def metrics_df(
+        self, include_weights: bool = False, include_shares: bool = False
+    ) -> pd.DataFrame:
+        # One row per portfolio, same columns as Portfolio.metrics_df
+        frames = [pd.DataFrame(self.metrics())]
         if include_weights:
-            combined_dict.update(weights_dict)
+            frames.append(pd.DataFrame(self.weights, columns=[f"{n}_W" for n in self.data.names]))
         if include_shares:
-            combined_dict.update(shares_dict)
+            frames.append(pd.DataFrame(self.shares, columns=[f"{n}_S" for n in self.data.names]))
 
-        return pd.DataFrame(combined_dict, index=[0])
+        return pd.concat(frames, axis=1)
@@ -0,0 +1,210 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from numpy.typing import NDArray
+
+from research.portfolio import Portfolio, PortfolioBatch
+
+
+def _missing(dtype: np.dtype[Any]) -> Any:
+    return np.nan if dtype.kind == "f" else None
+
+
+class _Column:
+    """
+    A growable 1D buffer. Numeric columns stay numeric; missing values upcast integers
+    to float (NaN) and anything else to object (None).
+    """
+
+    def __init__(self, capacity: int, length: int, values: NDArray[Any]):
+        dtype = values.dtype if values.dtype.kind in "biuf" else np.dtype(object)
+        self.data: NDArray[Any] = np.empty(capacity, dtype=dtype)
+
+        # Column first seen after `length` rows: those rows are missing
+        if length:
+            self.fill_missing(0, length)
+
+    def _upcast(self, dtype: np.dtype[Any]) -> None:
+        if dtype != self.data.dtype:
+            self.data = self.data.astype(dtype)
+
+    def write(self, start: int, values: NDArray[Any]) -> None:
+        if values.dtype.kind not in "biuf" or self.data.dtype.kind == "O":
+            self._upcast(np.dtype(object))
+        else:
+            self._upcast(np.result_type(self.data.dtype, values.dtype))
+
+        self.data[start : start + len(values)] = values
+
+    def fill_missing(self, start: int, stop: int) -> None:
+        if self.data.dtype.kind in "biu":
+            self._upcast(np.dtype(np.float64) if self.data.dtype.kind != "b" else np.dtype(object))
+
+        self.data[start:stop] = _missing(self.data.dtype)
+
+    def grow(self, capacity: int) -> None:
+        data = np.empty(capacity, dtype=self.data.dtype)
+        data[: len(self.data)] = self.data
+        self.data = data
+
+
+class ResultsAccumulator:
+    """
+    Columnar store for experiment results.
+
+    Scalar columns (labels and metrics) and per-asset blocks (weights, shares) live in
+    preallocated NumPy buffers that double when full, so adding a row never builds a
+    DataFrame. The table is materialized once at the end with to_frame or to_arrow,
+    with weights and shares either as one column per asset (wide) or one row per
+    asset (long).
+    """
+
+    def __init__(self, names: NDArray[np.str_] | None = None, capacity: int = 64):
+        self.names = names
+        self._capacity = max(capacity, 1)
+        self._length = 0
+        self._columns: dict[str, _Column] = {}
+        self._blocks: dict[str, NDArray[np.float64]] = {}
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _reserve(self, rows: int) -> None:
+        # Geometric growth keeps appends amortized O(1)
+        capacity = self._capacity
+        while self._length + rows > capacity:
+            capacity *= 2
+
+        if capacity == self._capacity:
+            return
+
+        for column in self._columns.values():
+            column.grow(capacity)
+        for key, block in self._blocks.items():
+            grown = np.full((capacity, block.shape[1]), np.nan)
+            grown[: self._length] = block[: self._length]
+            self._blocks[key] = grown
+
+        self._capacity = capacity
+
+    def extend(self, columns: dict[str, Any], **blocks: NDArray[np.float64] | None) -> None:
+        """
+        Append rows given as column arrays (scalars are broadcast to every row) and optional
+        per-asset blocks, e.g. weights=(rows, n_assets).
+        """
+        arrays = {
+            key: np.atleast_2d(np.asarray(block, dtype=np.float64))
+            for key, block in blocks.items()
+            if block is not None
+        }
+        sized = [np.shape(value)[0] for value in columns.values() if np.ndim(value) > 0]
+        sized += [block.shape[0] for block in arrays.values()]
+        rows = sized[0] if sized else 1
+        if any(size != rows for size in sized):
+            raise ValueError("All columns must have the same number of rows")
+
+        self._reserve(rows)
+        start, stop = self._length, self._length + rows
+
+        for key, value in columns.items():
+            values = np.asarray(value)
+            values = np.broadcast_to(values, rows) if values.ndim == 0 else values
+            if key not in self._columns:
+                self._columns[key] = _Column(self._capacity, start, values)
+            self._columns[key].write(start, values)
+
+        for key, column in self._columns.items():
+            if key not in columns:
+                column.fill_missing(start, stop)
+
+        for key, block in arrays.items():
+            if key not in self._blocks:
+                self._blocks[key] = np.full((self._capacity, block.shape[1]), np.nan)
+            self._blocks[key][start:stop] = block
+
+        self._length = stop
+
+    def append(self, row: dict[str, Any], **blocks: NDArray[np.float64] | None) -> None:
+        self.extend({key: [value] for key, value in row.items()}, **blocks)
+
+    def add_portfolio(
+        self,
+        portfolio: Portfolio,
+        include_weights: bool = False,
+        include_shares: bool = False,
+        **labels: Any,
+    ) -> None:
+        self.append(
+            {**labels, **portfolio.metrics()},
+            weights=portfolio.weights if include_weights else None,
+            shares=portfolio.shares if include_shares else None,
+        )
+
+    def add_batch(
+        self,
+        batch: PortfolioBatch,
+        include_weights: bool = False,
+        include_shares: bool = False,
+        **labels: Any,
+    ) -> None:
+        """Append every portfolio of a batch; labels may be scalars or one value per row."""
+        self.extend(
+            {**labels, **batch.metrics()},
+            weights=batch.weights if include_weights else None,
+            shares=batch.shares if include_shares else None,
+        )
+
+    def columns(self) -> dict[str, NDArray[Any]]:
+        return {key: column.data[: self._length] for key, column in self._columns.items()}
+
+    def blocks(self) -> dict[str, NDArray[np.float64]]:
+        return {key: block[: self._length] for key, block in self._blocks.items()}
+
+    def _asset_names(self, n_assets: int) -> list[str]:
+        if self.names is None:
+            return [str(i) for i in range(n_assets)]
+        return [str(name) for name in self.names]
+
+    def to_frame(self, layout: str = "wide") -> pd.DataFrame:
+        """
+        Materialize the results. "wide" adds {name}_W / {name}_S columns per asset, "long"
+        repeats the scalar columns for each asset with asset, weights and shares columns.
+        """
+        columns = self.columns()
+        blocks = self.blocks()
+        suffixes = {"weights": "_W", "shares": "_S"}
+
+        match layout:
+            case "wide":
+                frames = [pd.DataFrame(columns)]
+                for key, block in blocks.items():
+                    names = self._asset_names(block.shape[1])
+                    suffix = suffixes.get(key, f"_{key}")
+                    frames.append(pd.DataFrame(block, columns=[name + suffix for name in names]))
+                return pd.concat(frames, axis=1)
+
+            case "long":
+                if not blocks:
+                    return pd.DataFrame(columns)
+                n_assets = next(iter(blocks.values())).shape[1]
+                frame = pd.DataFrame(
+                    {key: np.repeat(values, n_assets) for key, values in columns.items()}
+                )
+                frame["asset"] = np.tile(self._asset_names(n_assets), self._length)
+                for key, block in blocks.items():
+                    frame[key] = block.reshape(-1)
+                return frame
+
+            case _:
+                raise ValueError(f"Unknown layout: {layout}")
+
+    def to_arrow(self) -> pa.Table:
+        """Materialize as an Arrow table; weights and shares become fixed-size list columns."""
+        arrays = {key: pa.array(values) for key, values in self.columns().items()}
+        for key, block in self.blocks().items():
+            flat = pa.array(block.reshape(-1))
+            arrays[key] = pa.FixedSizeListArray.from_arrays(flat, block.shape[1])
+
+        return pa.table(arrays)
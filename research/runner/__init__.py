@@ -0,0 +1,6 @@
+from .grid import expand
+from .run import run_experiment
+from .spec import load_spec, parse_spec
+from .store import ResultStore, load_results
+
+__all__ = ["expand", "load_results", "load_spec", "parse_spec", "ResultStore", "run_experiment"]
@@ -0,0 +1,111 @@
+import json
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from research.datasets import Basic, Historical, Synthetic
+from research.enums import Dataset, Optimizer
+from research.interfaces import AssetData, ExperimentSpec
+from research.optimizers.sweep import WARM_STARTED
+
+Sample = tuple[int | None, int]  # (n_assets, seed)
+Solve = tuple[Optimizer, float, float | None]  # (optimizer, budget, gamma)
+
+
+def expand(spec: ExperimentSpec) -> dict[Sample, list[dict[str, Any]]]:
+    """
+    Grid rows of a spec grouped by dataset sample. Integer optimizers already return whole
+    shares, so they get a single unrounded row instead of one per rounding method.
+    """
+    grid: dict[Sample, list[dict[str, Any]]] = {}
+    for n_assets in spec.n_assets:
+        for seed in spec.seeds:
+            rows = grid.setdefault((n_assets, seed), [])
+            for optimizer in spec.optimizers:
+                integer = optimizer in WARM_STARTED or optimizer is Optimizer.REBALANCE
+                roundings = [None] if integer else spec.roundings
+                for rounding in roundings:
+                    for budget in spec.budgets:
+                        for gamma in spec.gammas:
+                            rows.append(
+                                {
+                                    "n_assets": n_assets,
+                                    "seed": seed,
+                                    "optimizer": optimizer.value,
+                                    "rounding": None if rounding is None else rounding.value,
+                                    "budget": budget,
+                                    "gamma": gamma,
+                                }
+                            )
+    return grid
+
+
+def row_key(digest: str, row: dict[str, Any]) -> str:
+    return digest + ":" + json.dumps(row, sort_keys=True)
+
+
+def row_solve(row: dict[str, Any]) -> Solve:
+    return Optimizer(row["optimizer"]), row["budget"], row["gamma"]
+
+
+def solves(spec: ExperimentSpec, rows: list[dict[str, Any]]) -> list[Solve]:
+    """Distinct optimizations behind some rows of one sample, plus benchmarks and baselines."""
+    needed = dict.fromkeys(row_solve(row) for row in rows)
+    for reference in (spec.benchmark, spec.baseline):
+        if reference is not None:
+            for _, budget, gamma in list(needed):
+                needed[(reference, budget, gamma)] = None
+    return list(needed)
+
+
+def sampler(spec: ExperimentSpec) -> Callable[[int | None, int], AssetData]:
+    """Load the spec's dataset once and return a function drawing the (n_assets, seed) sample."""
+    options = dict(spec.dataset_options)
+
+    match spec.dataset:
+
+        case Dataset.BASIC:
+            data = Basic(**options).asset_data
+
+            def sample(n_assets: int | None, seed: int) -> AssetData:
+                if n_assets is not None:
+                    raise ValueError("The basic dataset has a fixed universe; use n_assets null")
+                return data
+
+        case Dataset.SYNTHETIC:
+            ranges = {
+                key: tuple(options.pop(key))
+                for key in ("volatility_range", "correlation_range")
+                if key in options
+            }
+
+            def sample(n_assets: int | None, seed: int) -> AssetData:
+                if n_assets is None:
+                    raise ValueError("The synthetic dataset needs n_assets")
+                # Seeded draw only: the constructor's asset_data uses the global RNG
+                synthetic = Synthetic(n_assets=n_assets, draw=False, **options)
+                return next(synthetic.universes(1, seed, **ranges))
+
+        case Dataset.HISTORICAL:
+            constant_covar = options.pop("constant_covar", True)
+            historical = Historical(**options)
+
+            def sample(n_assets: int | None, seed: int) -> AssetData:
+                if n_assets is None:
+                    raise ValueError("The historical dataset needs n_assets")
+                return historical.sample(n_assets, seed, constant_covar)
+
+    if spec.prices is None:
+        return sample
+
+    prices = np.array(spec.prices, dtype=np.float64)
+
+    def priced_sample(n_assets: int | None, seed: int) -> AssetData:
+        data = sample(n_assets, seed)
+        if len(prices) != len(data.names):
+            raise ValueError(f"{len(prices)} prices given for {len(data.names)} assets")
+        data.prices = prices
+        return data
+
+    return priced_sample
@@ -0,0 +1,150 @@
+import traceback
+from collections.abc import Iterator
+from typing import Any
+
+import pandas as pd
+
+from research.backlog import BacklogRisk
+from research.enums import Rounding
+from research.interfaces import AssetData, ExperimentSpec, TaskResult
+from research.optimizers import optimize_many
+from research.optimizers.batch import Task
+from research.portfolio import Portfolio
+
+from .grid import Sample, Solve, expand, row_key, row_solve, sampler, solves
+from .spec import settings_digest
+from .store import ResultStore, load_results
+
+RESULTS_DIR = "research/results/"
+
+
+def _evaluate_row(
+    spec: ExperimentSpec,
+    data: AssetData,
+    row: dict[str, Any],
+    solved: dict[Solve, TaskResult],
+    backlog_risk: BacklogRisk | None,
+) -> dict[str, Any]:
+    result = solved[row_solve(row)]
+    evaluated: dict[str, Any] = {"solve_time": result.solve_time, "error": result.error}
+    if not result.ok:
+        return evaluated
+
+    portfolio = Portfolio(data, result.weights, row["budget"], annualize=spec.annualize)
+    if row["rounding"] is not None:
+        portfolio.round(Rounding(row["rounding"]))
+
+    evaluated.update(portfolio.metrics())
+    evaluated["weights_sum"] = portfolio.weights.sum()
+
+    # Backlog risk against the benchmark solved on the same sample, budget and gamma
+    if spec.benchmark is not None and backlog_risk is not None:
+        benchmark = solved[(spec.benchmark, row["budget"], row["gamma"])]
+        is_benchmark = result is benchmark and row["rounding"] is None
+        if not benchmark.ok:
+            evaluated["error"] = f"Benchmark {spec.benchmark.value} failed:\n{benchmark.error}"
+        elif not is_benchmark:
+            evaluated["backlog"] = backlog_risk.risks(benchmark.weights, portfolio.weights)[0]
+
+            # Backlog variance relative to the (rounded) baseline portfolio's
+            if spec.baseline is not None:
+                baseline = solved[(spec.baseline, row["budget"], row["gamma"])]
+                if not baseline.ok:
+                    evaluated["error"] = f"Baseline {spec.baseline.value} failed:\n{baseline.error}"
+                else:
+                    baseline_portfolio = Portfolio(data, baseline.weights, row["budget"])
+                    baseline_weights = baseline_portfolio.round(spec.baseline_rounding)
+                    evaluated["backlog_ratio"] = backlog_risk.ratios(
+                        benchmark.weights, portfolio.weights, baseline_weights
+                    )[0]
+
+    if spec.include_weights:
+        evaluated.update(names=data.names, weights=portfolio.weights, shares=portfolio.shares)
+
+    return evaluated
+
+
+def _evaluate(
+    spec: ExperimentSpec,
+    digest: str,
+    data: AssetData,
+    rows: list[dict[str, Any]],
+    solved: dict[Solve, TaskResult],
+) -> Iterator[dict[str, Any]]:
+    backlog_risk = BacklogRisk(data, annualize=spec.annualize) if spec.benchmark else None
+
+    for row in rows:
+        try:
+            evaluated = _evaluate_row(spec, data, row, solved, backlog_risk)
+        except Exception:
+            evaluated = {"error": traceback.format_exc()}
+
+        yield {"key": row_key(digest, row), **row, **evaluated}
+
+
+def _select(results: pd.DataFrame, keys: set[str]) -> pd.DataFrame:
+    if results.empty:
+        return results
+    return results[results["key"].isin(keys)].reset_index(drop=True)
+
+
+def run_experiment(
+    spec: ExperimentSpec,
+    output: str | None = None,
+    max_workers: int | None = None,
+    chunksize: int = 1,
+) -> pd.DataFrame:
+    """
+    Run every cell of a spec's grid that is not already in `output` (default
+    research/results/{name}.jsonl) and return the spec's results. Rows left in the file by
+    other settings are kept on disk but not returned.
+
+    Each dataset sample is drawn once in this process; its distinct optimizations (shared by
+    rounding methods, plus the benchmark) run on a worker pool via optimize_many, and its rows
+    are evaluated and appended to the results file as soon as they finish. A rerun skips cells
+    that succeeded and retries failed ones; changing a setting other than the grid axes starts
+    the cells over.
+    """
+    output = output or RESULTS_DIR + spec.name + ".jsonl"
+    store = ResultStore(output)
+    digest = settings_digest(spec)
+    completed = store.completed()
+
+    grid = expand(spec)
+    pending = {
+        sample: [row for row in rows if row_key(digest, row) not in completed]
+        for sample, rows in grid.items()
+    }
+    keys = {row_key(digest, row) for rows in grid.values() for row in rows}
+    plan = [(sample, solves(spec, rows)) for sample, rows in pending.items() if rows]
+
+    n_cells = sum(len(rows) for rows in grid.values())
+    n_pending = sum(len(pending[sample]) for sample, _ in plan)
+    print(f"{spec.name}: {n_cells - n_pending} of {n_cells} cells done, running {n_pending}")
+    if not plan:
+        return _select(load_results(output), keys)
+
+    draw = sampler(spec)
+    samples: dict[Sample, AssetData] = {}
+
+    def tasks() -> Iterator[Task]:
+        for sample, sample_solves in plan:
+            data = samples[sample] = draw(*sample)
+            for optimizer, budget, gamma in sample_solves:
+                kwargs = {**spec.options, "budget": budget}
+                if gamma is not None:
+                    kwargs["gamma"] = gamma
+                yield optimizer, data, kwargs
+
+    # Results stream back in submission order, one sample's solves after another
+    results = optimize_many(tasks(), max_workers=max_workers, chunksize=chunksize)
+    n_failed = 0
+    for sample, sample_solves in plan:
+        solved = {solve: next(results) for solve in sample_solves}
+        rows = list(_evaluate(spec, digest, samples.pop(sample), pending[sample], solved))
+        store.append(rows)
+
+        n_failed += sum(row["error"] is not None for row in rows)
+
+    print(f"{spec.name}: {n_pending - n_failed} cells succeeded, {n_failed} failed -> {output}")
+    return _select(load_results(output), keys)
@@ -0,0 +1,75 @@
+import hashlib
+import json
+from dataclasses import asdict, fields
+from typing import Any
+
+from research.enums import Dataset, Optimizer, Rounding
+from research.interfaces import ExperimentSpec
+
+# Spec fields that change the value of every cell; the grid axes only add or remove cells
+SETTINGS = (
+    "dataset",
+    "benchmark",
+    "baseline",
+    "baseline_rounding",
+    "prices",
+    "dataset_options",
+    "options",
+    "annualize",
+    "include_weights",
+)
+
+
+def _listed(value: Any) -> list[Any]:
+    return value if isinstance(value, list) else [value]
+
+
+def parse_spec(raw: dict[str, Any]) -> ExperimentSpec:
+    """
+    ExperimentSpec from its JSON form: enums by value, null for "unrounded" / "default gamma"
+    / "whole dataset", scalars for single-value axes and an integer `seeds` for range(seeds).
+    """
+    known = {spec_field.name for spec_field in fields(ExperimentSpec)}
+    unknown = set(raw) - known
+    if unknown:
+        raise ValueError(f"Unknown spec fields: {', '.join(sorted(unknown))}")
+
+    values = dict(raw)
+    values["dataset"] = Dataset(raw["dataset"])
+    values["optimizers"] = [Optimizer(name) for name in _listed(raw["optimizers"])]
+
+    if "roundings" in raw:
+        values["roundings"] = [
+            None if name is None else Rounding(name) for name in _listed(raw["roundings"])
+        ]
+    if raw.get("benchmark") is not None:
+        values["benchmark"] = Optimizer(raw["benchmark"])
+    if raw.get("baseline") is not None:
+        if raw.get("benchmark") is None:
+            raise ValueError("A backlog ratio baseline needs a benchmark")
+        values["baseline"] = Optimizer(raw["baseline"])
+    if raw.get("baseline_rounding") is not None:
+        values["baseline_rounding"] = Rounding(raw["baseline_rounding"])
+    if isinstance(raw.get("seeds"), int):
+        values["seeds"] = list(range(raw["seeds"]))
+    for axis in ("budgets", "gammas", "n_assets", "seeds"):
+        if axis in values:
+            values[axis] = _listed(values[axis])
+
+    return ExperimentSpec(**values)
+
+
+def load_spec(path: str) -> ExperimentSpec:
+    with open(path) as file:
+        return parse_spec(json.load(file))
+
+
+def _json_default(value: Any) -> Any:
+    return value.value if isinstance(value, (Dataset, Optimizer, Rounding)) else str(value)
+
+
+def settings_digest(spec: ExperimentSpec) -> str:
+    """Hash of the settings shared by every cell, so changing them invalidates old results."""
+    settings = {name: asdict(spec)[name] for name in SETTINGS}
+    encoded = json.dumps(settings, sort_keys=True, default=_json_default)
+    return hashlib.blake2b(encoded.encode(), digest_size=8).hexdigest()
@@ -0,0 +1,71 @@
+import json
+import os
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _read_rows(path: str) -> list[dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+
+    rows = []
+    with open(path) as file:
+        for line in file:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue  # Line cut short by an interrupted run
+    return rows
+
+
+class ResultStore:
+    """
+    Append-only JSON-lines file of result rows, one row per grid cell, flushed to disk as each
+    batch is written so an interrupted run keeps everything finished before it stopped.
+    A cell rerun after a failure appends a new row; the last row per key wins.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Terminate a line cut short by an interrupted run before appending
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    with open(path, "a") as append:
+                        append.write("\n")
+
+    def completed(self) -> set[str]:
+        """Keys of the cells whose last row succeeded."""
+        status = {row["key"]: row.get("error") is None for row in _read_rows(self.path)}
+        return {key for key, ok in status.items() if ok}
+
+    def append(self, rows: Iterable[dict[str, Any]]) -> None:
+        with open(self.path, "a") as file:
+            for row in rows:
+                file.write(json.dumps(row, default=_json_default) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+
+def load_results(path: str) -> pd.DataFrame:
+    """Results of a run as a DataFrame, keeping the last row per cell."""
+    frame = pd.DataFrame(_read_rows(path))
+    if frame.empty:
+        return frame
+    return frame.drop_duplicates("key", keep="last").reset_index(drop=True)